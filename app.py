@@ -1,9 +1,15 @@
+import time
+_run_started = time.perf_counter()
+
 import streamlit as st
-from config.settings import init_environment, MODEL_NAME
-from core.session_utils import init_session_state
-from core.gemini_utils import ensure_chat_sessions
-from core.pdf_utils import extract_text_from_pdf
-from core.file_utils import load_last_notes, save_notes
+from config.settings import init_environment, MODEL_NAME, STYLES_PATH
+from core.session_utils import init_session_state, set_notes_text, student_id
+from core.ingest_cache import ingest_text_upload, lookup_upload
+from core.ingest_pipeline import cancel_ingest_job, start_ingest_job, finish_ingest_job
+from core.file_utils import save_notes, read_styles
+from core.notes_library import get_notes_library
+from core.precompute import schedule_precompute, cancel_precompute
+from core.startup import StageTimer, get_startup_report
 from features.chat_general import general_chat_tab
 from features.chat_notes import notes_qa_tab
 from features.summarize_notes import summarize_tab
@@ -14,16 +20,21 @@ from features.sidebar_stats import sidebar_stats
 # ==========================================================
 # 0️⃣ INITIAL SETUP
 # ==========================================================
-init_environment()
-init_session_state(MODEL_NAME)
-ensure_chat_sessions(MODEL_NAME)
+# Imports only cost time on the first run of the server process; later reruns reuse them
+timer = StageTimer(_run_started)
+timer.mark("imports")
 
 # Set Streamlit page configuration
 st.set_page_config(page_title="📘 AI Study Assistant", page_icon="📚", layout="wide")
 
-# Load custom CSS for styling (UTF-8 to prevent emoji decode errors)
-with open("assets/styles.css", "r", encoding="utf-8") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+init_environment()
+timer.mark("environment")
+init_session_state(MODEL_NAME)
+timer.mark("session")
+
+# Custom CSS for styling (read from disk once per process)
+st.markdown(f"<style>{read_styles(STYLES_PATH)}</style>", unsafe_allow_html=True)
+timer.mark("styles")
 
 st.title("📘 AI Study Assistant")
 
@@ -31,11 +42,34 @@ st.title("📘 AI Study Assistant")
 # ==========================================================
 # 1️⃣ LOAD PREVIOUSLY SAVED NOTES (IF AVAILABLE)
 # ==========================================================
-if not st.session_state.get("notes_text"):
-    last_notes = load_last_notes()
-    if last_notes:
-        st.session_state.notes_text = last_notes
-        st.toast("📄 Loaded your last saved notes automatically!")
+# The student's own latest upload from their library: notes/latest_notes.txt is shared by
+# every session, so it would hand a new student whatever someone else uploaded last.
+# Restored once per session, so Clear Notes sticks.
+if not st.session_state.get("notes_text") and not st.session_state.get("notes_restored"):
+    st.session_state.notes_restored = True
+    last_doc = get_notes_library().latest(student_id())
+    if last_doc is not None:
+        try:
+            set_notes_text(get_notes_library().read_text(last_doc["id"]))
+            st.toast("📄 Loaded your last saved notes automatically!")
+        except OSError:
+            pass  # removed by its last owner in the meantime
+
+
+@st.fragment(run_every=1.0)
+def ingest_progress():
+    """Poll the background PDF ingest and reload the app once it finishes."""
+    job = st.session_state.get("notes_ingest_job")
+    if job is None:
+        return
+    if job.running:
+        done, total = job.pages_done, job.total_pages or 0
+        st.progress(done / max(total, 1), text=f"Reading page {done}/{total or '?'}…")
+        st.caption("You can already ask questions about the pages read so far.")
+        return
+    if finish_ingest_job(job):
+        schedule_precompute(st.session_state.notes_text)
+    st.rerun()
 
 
 # ==========================================================
@@ -49,25 +83,61 @@ with st.sidebar:
     uploaded = st.file_uploader("Upload PDF or TXT", type=["pdf", "txt"])
 
     if uploaded:
-        # Handle text and PDF uploads
-        if uploaded.type == "text/plain":
-            text = uploaded.read().decode("utf-8", errors="ignore")
-        else:
-            text = extract_text_from_pdf(uploaded)
-
-        if text:
-            st.session_state.notes_text = text
-            save_notes(text)
-            st.success("✅ Notes loaded and saved successfully!")
-            st.caption(f"Characters: {len(text):,}")
-            with st.expander("📘 Preview (first 800 chars)"):
-                st.text(text[:800])
+        # Reruns hand back the same upload; only new content is extracted and saved
+        if st.session_state.get("notes_upload_id") != uploaded.file_id:
+            # A PDF still streaming in from an earlier upload must not replace these notes when it finishes
+            cancel_ingest_job()
+            data = uploaded.getvalue()
+            key, result = lookup_upload(data)
+            cache_hit = result is not None
+            if not cache_hit and uploaded.type != "text/plain":
+                # PDFs stream in the background; Q&A works on the pages read so far
+                start_ingest_job(key, data, uploaded.name)
+            elif not cache_hit:
+                key, result, cache_hit = ingest_text_upload(data)
+
+            if result and result["text"]:
+                if key != st.session_state.get("notes_upload_key") or not st.session_state.get("notes_text"):
+                    save_notes(set_notes_text(result["text"]))
+                    get_notes_library().add(uploaded.name, st.session_state.notes_text, student_id(),
+                                            result["stats"])
+                    st.session_state.notes_upload_key = key
+                    # Summaries, quiz questions and the index get ready before the first click
+                    schedule_precompute(st.session_state.notes_text)
+                st.session_state.notes_ingest = dict(result["stats"], cache_hit=cache_hit)
+                st.session_state.notes_ingest_error = None
+            st.session_state.notes_upload_id = uploaded.file_id
+
+    if st.session_state.get("notes_ingest_job"):
+        ingest_progress()
+    elif st.session_state.get("notes_ingest_error"):
+        st.error(f"Failed to read PDF: {st.session_state.notes_ingest_error}")
+    elif uploaded and st.session_state.get("notes_ingest") and st.session_state.get("notes_text"):
+        ingest = st.session_state.notes_ingest
+        text = st.session_state.notes_text
+        st.success("✅ Notes loaded and saved successfully!")
+        st.caption(f"Characters: {len(text):,}" + (" · from cache" if ingest.get("cache_hit") else ""))
+        with st.expander("📘 Preview (first 800 chars)"):
+            st.text(text[:800])
 
     # ✅ Clear Notes Button (unique key)
     if st.session_state.get("notes_text"):
         if st.button("🗑️ Clear Notes", key='clear_notes_sidebar'):
-            st.session_state.notes_text = ""
-            st.experimental_rerun()
+            set_notes_text("")
+            cancel_ingest_job()
+            cancel_precompute()
+            st.rerun()
+
+    # --- Notes Library (every uploaded document; Q&A can search across them) ---
+    documents = get_notes_library().documents(student_id())
+    if documents:
+        with st.expander(f"📚 Notes Library ({len(documents)})"):
+            for doc in documents:
+                col1, col2 = st.columns([4, 1])
+                col1.caption(f"**{doc['name']}** · {doc['words']:,} words")
+                if col2.button("🗑️", key=f"library_remove_{doc['id']}", help="Remove from the library"):
+                    get_notes_library().remove(doc["id"], student_id())
+                    st.rerun()
 
     # Close Study Notes section
     st.markdown("</div>", unsafe_allow_html=True)
@@ -119,3 +189,5 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+timer.mark("render")
+get_startup_report().record(timer.stages)
@@ -0,0 +1,44 @@
+# benchmarks/bench_pdf_extract.py
+"""Serial vs. process-pool PDF extraction on synthetic PDFs.
+
+Run from the repo root:  python -m benchmarks.bench_pdf_extract [--pages 20 100 400]
+"""
+import argparse
+import io
+import os
+import time
+
+from benchmarks.synthetic import make_pdf
+from core.pdf_utils import extract_pages_from_pdf, extract_pages_parallel
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers}")
+    print(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for pages in args.pages:
+        data = make_pdf(pages)
+        serial_s, serial = best_of(lambda: extract_pages_from_pdf(io.BytesIO(data)), args.repeat)
+        parallel_s, parallel = best_of(
+            lambda: extract_pages_parallel(data, workers=args.workers, min_pages=0), args.repeat
+        )
+        assert serial == parallel, "parallel extraction changed page text or order"
+        print(f"{pages:>6} {serial_s:>10.2f} {parallel_s:>11.2f} {serial_s / parallel_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/check_chunking.py
+"""Check that ChunkStream yields exactly the chunks ChunkTable cuts from the whole text.
+
+Ingest chunks uploads as they stream in while the tabs chunk the saved
+string, so the two must agree chunk for chunk. Run from the repo root:
+
+    python -m benchmarks.check_chunking [--seed 0] [--rounds 200]
+
+Exit code 1 (with the first differing case) on any mismatch.
+"""
+import argparse
+import random
+import sys
+
+from benchmarks.synthetic import make_notes
+from core.text_utils import ChunkStream, ChunkTable
+
+# (max_chars, overlap): the app's defaults plus small windows that hit many boundaries
+SETTINGS = ((8000, 300), (200, 30), (50, 10), (10, 0), (1, 0))
+
+
+def edge_cases(max_chars):
+    """Texts at and around the places chunking treats specially."""
+    word = "lorem "
+    sentence = "Cells divide. "
+    return {
+        "empty": "",
+        "whitespace only": " \n\n\t  \n",
+        "shorter than max": "Short notes.",
+        "exactly max": ("x" * max_chars),
+        "max plus one": ("x" * (max_chars + 1)),
+        "no whitespace": "y" * (max_chars * 3 + 7),
+        "leading/trailing space": "\n\n   " + sentence * (max_chars // len(sentence) + 3) + "  \n\n",
+        "words only": (word * (max_chars * 3 // len(word) + 2)).strip(),
+        "sentences only": sentence * (max_chars * 3 // len(sentence) + 2),
+        "paragraphs": ("Topic.\n\n" + sentence * 3) * (max_chars // 20 + 4),
+        "closing quotes": 'He said "stop." (Then left.) ' * (max_chars // 10 + 4),
+        "space at boundary": "a" * (max_chars - 1) + " " + "b" * max_chars,
+        "break at boundary": "a" * (max_chars // 2) + "\n\n" + "b" * max_chars,
+    }
+
+
+def pieces(text, rng):
+    """Yield the text in splits of the kinds a streamed upload produces."""
+    yield "whole", [text]
+    yield "one char", list(text)
+    size = rng.randint(1, 64)
+    yield f"{size} chars", [text[i:i + size] for i in range(0, len(text), size)]
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 12))))
+    yield "random cuts", [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def stream_chunks(parts, max_chars, overlap):
+    stream = ChunkStream(max_chars, overlap)
+    chunks = []
+    for part in parts:
+        chunks.extend(stream.feed(part))
+    return chunks + stream.close()
+
+
+def check(name, text, max_chars, overlap, rng):
+    """None if every split agrees with ChunkTable, else a description of the first mismatch."""
+    expected = list(ChunkTable(text, max_chars, overlap))
+    for split, parts in pieces(text, rng):
+        if split == "one char" and len(text) > 20_000:
+            continue  # too slow for the long documents, covered by the short ones
+        got = stream_chunks(parts, max_chars, overlap)
+        if got != expected:
+            at = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+            return (f"{name} (max_chars={max_chars}, overlap={overlap}, {split}): "
+                    f"{len(got)} chunks streamed vs {len(expected)}, first difference at chunk {at}")
+    return None
+
+
+def cases(rng, rounds):
+    for max_chars, overlap in SETTINGS:
+        for name, text in edge_cases(max_chars).items():
+            yield name, text, max_chars, overlap
+    for size in (10_000, 100_000):
+        yield f"synthetic notes {size // 1000}KB", make_notes(size), 8000, 300
+    alphabet = "ab .!?\n\"')"
+    for i in range(rounds):
+        max_chars = rng.randint(1, 80)
+        overlap = rng.randint(0, max_chars)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 400)))
+        yield f"random text #{i}", text, max_chars, overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=200, help="random texts on top of the fixed cases")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checked = 0
+    for name, text, max_chars, overlap in cases(rng, args.rounds):
+        problem = check(name, text, max_chars, overlap, rng)
+        if problem:
+            print(f"MISMATCH: {problem}")
+            return 1
+        checked += 1
+    print(f"ChunkStream matches ChunkTable on all {checked} cases (seed {args.seed}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# benchmarks/load_test.py
+"""Multi-session load test for app.py on the offline fake LLM backend.
+
+Each simulated student is its own Streamlit session (an AppTest running
+app.py) that uploads notes, asks questions in the notes Q&A tab,
+summarizes and plays a quiz. Sessions run concurrently; the harness
+reports rerun latency percentiles per step, throughput, memory per
+session and rate-limiter queueing at each concurrency level:
+
+    python -m benchmarks.load_test --sessions 1,5,10,20
+    python -m benchmarks.load_test --sessions 10 --rpm 10     # the real free-tier quota
+
+No API key is used. Uploads go through ingest_text_upload() and the same
+session keys the sidebar sets, since AppTest cannot drive a file uploader.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+os.environ["LLM_BACKEND"] = "fake"
+
+from streamlit import config as st_config  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.runtime import Runtime  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.synthetic import make_notes  # noqa: E402
+from core.ingest_cache import ingest_text_upload  # noqa: E402
+from core.llm_backend import FakeBackend, set_backend  # noqa: E402
+from core.jobs import get_job_executor  # noqa: E402
+from core.metrics import get_metrics, percentile  # noqa: E402
+from core.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "load_test.json")
+QUESTIONS = (
+    "What are the main ideas in these notes?",
+    "Explain the most important definition.",
+    "How do the first and last sections relate?",
+)
+
+
+def rss_bytes():
+    """Current resident set size (falls back to the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def allow_concurrent_apptests():
+    """AppTest is written for one run at a time: each run installs a mock Runtime
+    in a global and clears it when done, and flips the appTest option only
+    for its own duration. Keep a shared mock runtime and the option on so
+    concurrent sessions do not pull them out from under each other.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    Runtime.instance = classmethod(lambda cls: cls._instance or runtime)
+    st_config.set_option("global.appTest", True)
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def notes_input(at):
+    return next(c for c in at.chat_input if c.placeholder.startswith("Ask a question from your notes"))
+
+
+class SimulatedSession:
+    """One student's session; every at.run() is timed as a rerun of `step`."""
+
+    def __init__(self, index, notes_bytes, questions, timeout):
+        self.index = index
+        self.notes_bytes = notes_bytes
+        self.questions = questions
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.timings = []  # [(step, seconds)]
+        self.errors = []
+
+    def run(self, step, action=None):
+        started = time.perf_counter()
+        if action is not None:
+            action()
+        else:
+            self.at.run()
+        self.timings.append((step, time.perf_counter() - started))
+        if self.at.exception:
+            self.errors.append(f"{step}: {self.at.exception[0].message}")
+
+    def upload(self):
+        key, result, cache_hit = ingest_text_upload(self.notes_bytes)
+        self.at.session_state["notes_text"] = result["text"]
+        self.at.session_state["notes_upload_key"] = key
+        self.at.session_state["notes_ingest"] = dict(result["stats"], cache_hit=cache_hit)
+        self.at.run()
+
+    def job_running(self, slot):
+        jobs = self.at.session_state["jobs"] if "jobs" in self.at.session_state else {}
+        job = get_job_executor().get(jobs.get(slot))
+        return job is not None and job.running
+
+    def wait_for_summary(self, poll=0.2, limit=60.0):
+        """Summaries run as background jobs; rerun until this session's one finishes."""
+        deadline = time.monotonic() + limit
+        while self.job_running("summary") and time.monotonic() < deadline:
+            time.sleep(poll)
+            self.run("summary_poll")
+
+    def play_quiz(self, poll=0.2, limit=60.0):
+        """Wait for the first question (streamed quizzes fill in over reruns), then answer it."""
+        deadline = time.monotonic() + limit
+        while not self.at.session_state["generated_mcqs"] and time.monotonic() < deadline:
+            time.sleep(poll)
+            self.run("quiz_poll")
+        if self.at.session_state["generated_mcqs"]:
+            self.run("quiz_answer", lambda: button(self.at, "Submit Answer").click().run())
+
+    def script(self):
+        try:
+            self.run("open")
+            self.run("upload", self.upload)
+            for question in self.questions:
+                self.run("notes_qa", lambda q=question: notes_input(self.at).set_value(q).run())
+            self.run("summarize", lambda: button(self.at, "🧾 Generate Summary").click().run())
+            self.wait_for_summary()
+            self.run("quiz_create", lambda: button(self.at, "🎯 Create Quiz").click().run())
+            self.play_quiz()
+        except Exception as e:  # keep the other sessions going
+            self.errors.append(f"{type(e).__name__}: {e}")
+        return self
+
+
+class LimiterSampler(threading.Thread):
+    """Samples the shared limiter's queue while a level runs."""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.max_queue = 0
+        self.max_waiting = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            stats = get_rate_limiter().stats()
+            self.max_queue = max(self.max_queue, stats["queue_depth"])
+            self.max_waiting = max(self.max_waiting, stats["waiting_sessions"])
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def quantiles(values):
+    values = sorted(values)
+    return {f"p{int(q * 100)}": percentile(values, q) for q in (0.5, 0.9, 0.99)}
+
+
+def run_level(sessions, args, backend, seed):
+    notes = [make_notes(args.notes_bytes, seed=seed + (0 if args.shared_notes else i)).encode("utf-8")
+             for i in range(sessions)]
+    calls_before = backend.stats()["calls"]
+    rss_before = rss_bytes()
+    started_wall = time.time()
+    sampler = LimiterSampler()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="load-session") as pool:
+        users = list(pool.map(
+            lambda i: SimulatedSession(i, notes[i], QUESTIONS[:args.questions], args.timeout).script(),
+            range(sessions),
+        ))
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    rss_after = rss_bytes()  # AppTests (and their session state) are still alive here
+
+    timings = [t for user in users for t in user.timings]
+    steps = {}
+    for step, seconds in timings:
+        steps.setdefault(step, []).append(seconds)
+    calls = [c for c in list(get_metrics().recent) if c["at"] >= started_wall]
+    waits = [c["queue_wait"] for c in calls if not c["cache_hit"]]
+    llm_calls = backend.stats()["calls"] - calls_before
+    return {
+        "sessions": sessions,
+        "seconds": round(elapsed, 3),
+        "reruns": len(timings),
+        "reruns_per_s": round(len(timings) / elapsed, 2),
+        "llm_calls": llm_calls,
+        "llm_calls_per_s": round(llm_calls / elapsed, 2),
+        "rerun_latency": quantiles(s for _, s in timings),
+        "steps": {step: dict(quantiles(values), n=len(values)) for step, values in steps.items()},
+        "memory_per_session_mb": round((rss_after - rss_before) / sessions / 2**20, 2),
+        "limiter": {
+            "max_queue_depth": sampler.max_queue,
+            "max_waiting_sessions": sampler.max_waiting,
+            "queue_wait": quantiles(waits),
+        },
+        "errors": [e for user in users for e in user.errors],
+    }
+
+
+def fmt(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test on the fake LLM backend.")
+    parser.add_argument("--sessions", default="1,5,10", help="comma-separated concurrency levels")
+    parser.add_argument("--questions", type=int, default=2, help="notes Q&A turns per session (max 3)")
+    parser.add_argument("--notes-bytes", type=int, default=20_000)
+    parser.add_argument("--shared-notes", action="store_true", help="every session uploads the same notes")
+    parser.add_argument("--rpm", type=int, default=6000, help="shared limiter requests per minute")
+    parser.add_argument("--tpm", type=int, default=100_000_000, help="shared limiter tokens per minute")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="fake a 429 every Nth call")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="notes seed (default: time-based, so "
+                                                                "the response cache starts cold)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    allow_concurrent_apptests()
+    backend = set_backend(FakeBackend(tokens_per_second=args.tokens_per_second,
+                                      first_token_latency=args.first_token_latency,
+                                      rate_limit_every=args.rate_limit_every))
+    set_rate_limiter(RateLimiter(rpm=args.rpm, tpm=args.tpm))
+    seed = args.seed if args.seed is not None else int(time.time())
+    # One unmeasured session first, so imports and first-run setup do not count as per-session memory
+    SimulatedSession(-1, make_notes(args.notes_bytes, seed=seed - 1).encode("utf-8"), QUESTIONS[:1],
+                     args.timeout).script()
+
+    levels = []
+    for n, sessions in enumerate(int(s) for s in args.sessions.split(",")):
+        level = run_level(sessions, args, backend, seed + n * 10_000)
+        levels.append(level)
+        lat = level["rerun_latency"]
+        print(f"{sessions:>4} sessions: {level['reruns_per_s']:>6} reruns/s, {level['llm_calls_per_s']:>6} "
+              f"LLM calls/s, rerun p50 {fmt(lat['p50'])} p90 {fmt(lat['p90'])} p99 {fmt(lat['p99'])}, "
+              f"{level['memory_per_session_mb']} MB/session, max queue {level['limiter']['max_queue_depth']}, "
+              f"queue wait p90 {fmt(level['limiter']['queue_wait']['p90'])}, errors {len(level['errors'])}")
+        for step, row in level["steps"].items():
+            print(f"       {step:<12} n={row['n']:<4} p50 {fmt(row['p50'])} p90 {fmt(row['p90'])}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+    print(f"\nSaved {args.output}")
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# benchmarks/run_benchmarks.py
+"""Micro-benchmarks for the text, retrieval, parsing and PDF hot paths.
+
+Runs offline on synthetic corpora (no API key needed). From the repo root:
+
+    python -m benchmarks.run_benchmarks                 # full run, 10 KB .. 50 MB
+    python -m benchmarks.run_benchmarks --quick         # up to 1 MB, small PDFs
+    python -m benchmarks.run_benchmarks --save-baseline # store results as the baseline
+
+Each run writes benchmarks/results/latest.json (not tracked) and flags
+benchmarks that got slower than --tolerance times the baseline (exit code
+1 with --fail-on-regression). The baseline is benchmarks/baseline.json,
+a committed --quick run; timings depend on the machine, so regenerate it
+with --quick --save-baseline on the machine you compare on, or point
+--baseline at another results file.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import make_mcq_text, make_notes, make_pdf
+from core.pdf_utils import extract_text_from_pdf
+from core.search_index import BM25Index
+from core.text_utils import (
+    build_notes_prompt, keyword_score, parse_mcq_text, pick_relevant_chunks, split_into_chunks,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(HERE, "results", "latest.json")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+SIZES = {"10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000, "10MB": 10_000_000, "50MB": 50_000_000}
+QUICK_SIZES = ("10KB", "100KB", "1MB")
+MCQ_COUNTS = (5, 20, 200)
+PDF_PAGES = (2, 10, 40)
+QUICK_PDF_PAGES = (2, 10)
+QUESTION = "What is the role of mitochondria in cell respiration and energy?"
+
+
+def measure(fn, repeat=5, min_time=0.05):
+    """Best and median seconds per call; loops fast functions until min_time per sample."""
+    number, started = 1, time.perf_counter()
+    fn()
+    first = time.perf_counter() - started
+    if first < min_time:
+        number = max(1, int(min_time / max(first, 1e-7)))
+    samples = []
+    for _ in range(repeat if first < 1.0 else max(1, repeat // 2)):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return {"min_s": min(samples), "median_s": statistics.median(samples), "runs": len(samples) * number}
+
+
+def text_benchmarks(sizes):
+    for label in sizes:
+        text = make_notes(SIZES[label], seed=1)
+        chunks = split_into_chunks(text)
+        ranked = chunks[:3]
+        index = BM25Index.from_text(text)
+        yield f"split_into_chunks[{label}]", lambda: split_into_chunks(text)
+        yield f"keyword_score[{label}]", lambda: [keyword_score(c, QUESTION) for c in chunks]
+        yield f"pick_relevant_chunks[{label}]", lambda: pick_relevant_chunks(text, QUESTION)
+        yield f"bm25_build[{label}]", lambda: BM25Index.from_text(text)
+        yield f"bm25_query[{label}]", lambda: index.top_chunks(QUESTION)
+        yield f"build_notes_prompt[{label}]", lambda: build_notes_prompt(ranked, QUESTION, budget_tokens=8000)
+
+
+def parse_benchmarks():
+    for count in MCQ_COUNTS:
+        quiz = make_mcq_text(count, seed=2)
+        yield f"parse_mcq_text[{count}q]", lambda: parse_mcq_text(quiz)
+
+
+def pdf_benchmarks(pages_list):
+    for pages in pages_list:
+        data = make_pdf(pages, seed=3)
+        yield f"extract_text_from_pdf[{pages}p]", lambda: extract_text_from_pdf(io.BytesIO(data))
+
+
+def compare(results, baseline, tolerance):
+    """Benchmarks whose best time exceeds tolerance x the baseline's best time."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and result["min_s"] > base["min_s"] * tolerance:
+            regressions.append((name, base["min_s"], result["min_s"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the study assistant.")
+    parser.add_argument("--quick", action="store_true", help="corpora up to 1 MB and small PDFs only")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="results file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else tuple(SIZES)
+    pages = QUICK_PDF_PAGES if args.quick else PDF_PAGES
+    suites = (text_benchmarks(sizes), parse_benchmarks(), pdf_benchmarks(pages))
+
+    results = {}
+    for suite in suites:
+        for name, fn in suite:
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, repeat=args.repeat)
+            print(f"{name:<36} {results[name]['min_s'] * 1000:>12.3f} ms  (median {results[name]['median_s'] * 1000:.3f})")
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"\nSaved {args.output}" + (f" and baseline {args.baseline}" if args.save_baseline else ""))
+
+    if args.save_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; nothing compared.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    baseline = saved["results"]
+    meta = saved.get("meta", {})
+    print(f"Baseline {args.baseline}: {meta.get('created', '?')}, Python {meta.get('python', '?')}, "
+          f"{meta.get('platform', '?')}" + (" (--quick)" if meta.get("quick") else ""))
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance}x).")
+        return 0
+    print(f"\nRegressions (> {args.tolerance}x baseline):")
+    for name, before, after in regressions:
+        print(f"  {name:<36} {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({after / before:.2f}x)")
+    return 1 if args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# benchmarks/synthetic.py
+"""Deterministic synthetic notes and PDFs for benchmarks (no network, no API key)."""
+import random
+
+WORDS = (
+    "cell membrane protein enzyme energy photosynthesis respiration mitochondria "
+    "nucleus gene chromosome mutation evolution selection population ecosystem "
+    "force mass velocity acceleration momentum energy work power circuit current "
+    "voltage resistance theorem proof integral derivative limit function matrix "
+    "vector probability variance distribution sample hypothesis market demand "
+    "supply price inflation revolution empire treaty constitution parliament"
+).split()
+
+
+def make_paragraph(rng, sentences=5):
+    out = []
+    for _ in range(sentences):
+        words = rng.choices(WORDS, k=rng.randint(8, 18))
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+def make_notes(size_bytes, seed=0):
+    """Plain-text notes of roughly size_bytes, split into titled sections."""
+    rng = random.Random(seed)
+    parts, size, section = [], 0, 1
+    while size < size_bytes:
+        block = f"Section {section}\n\n" + "\n\n".join(make_paragraph(rng) for _ in range(4))
+        parts.append(block)
+        size += len(block) + 2
+        section += 1
+    return "\n\n".join(parts)[:size_bytes]
+
+
+def make_mcq_text(count, seed=0):
+    """Quiz text in the format the quiz prompt asks Gemini for."""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(1, count + 1):
+        options = [" ".join(rng.choices(WORDS, k=3)) for _ in range(4)]
+        blocks.append(
+            f"Q{i}. {make_paragraph(rng, 1)}\n"
+            + "\n".join(f"{letter}) {opt}" for letter, opt in zip("ABCD", options))
+            + f"\nAnswer: {rng.choice('ABCD')}"
+        )
+    return "\n\n".join(blocks)
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, lines_per_page=45, seed=0):
+    """Bytes of a minimal valid PDF with `pages` pages of Helvetica text."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choices(WORDS, k=10)) for _ in range(lines_per_page)]
+        body = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_pdf_escape(l)}) '" for l in lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
@@ -1,16 +1,115 @@
 # config/settings.py
 import os
+import threading
 from dotenv import load_dotenv
-import google.generativeai as genai
-import streamlit as st
 
 MODEL_NAME = "gemini-2.5-flash"
 
+# Streaming UI: redraw the answer at most this often, or once this many new chars arrive
+STREAM_FLUSH_INTERVAL = 0.15
+STREAM_FLUSH_CHARS = 600
+
+# Shared API quota for the whole server process (all sessions together)
+RATE_LIMIT_RPM = 10
+RATE_LIMIT_TPM = 250_000
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF_BASE = 2.0
+RATE_LIMIT_BACKOFF_MAX = 30.0
+
+# Finished summary/quiz answers, keyed by model + prompt + notes version
+RESPONSE_CACHE_PATH = os.path.join("notes", ".response_cache.sqlite")
+RESPONSE_CACHE_MEMORY_ENTRIES = 64
+
+# Map-reduce summaries: parallel section calls, and the most text one reduce call may take
+SUMMARY_MAP_WORKERS = 4
+SUMMARY_REDUCE_CHARS = 24_000
+
+# Sharded quizzes: parallel shard calls, dedupe threshold, over-generation slack
+QUIZ_SHARD_WORKERS = 4
+QUIZ_DUPLICATE_SIMILARITY = 0.8
+QUIZ_EXTRA_FRACTION = 0.25
+
+# Question bank: generated MCQs per notes/chunk/difficulty, served without repeats to each student.
+# When a student has too few unseen questions left, at least QUIZ_BANK_BATCH new ones are generated,
+# with up to QUIZ_BANK_AVOID banked questions per section listed in the prompt so they are not repeated.
+QUIZ_BANK_PATH = os.path.join("notes", ".quiz_bank.sqlite")
+QUIZ_BANK_BATCH = 10
+QUIZ_BANK_AVOID = 20
+
+# Chat history sent with each turn; older turns are dropped (or summarized if enabled)
+CHAT_HISTORY_TOKENS = 6_000
+CHAT_HISTORY_SUMMARY = False
+
+# Chat transcripts: append-only JSONL files per session, a new segment every N messages;
+# only the newest messages stay in memory, and files of sessions idle for KEEP_SECONDS are deleted
+TRANSCRIPT_SEGMENT_MESSAGES = 200
+TRANSCRIPT_MEMORY_MESSAGES = 100
+TRANSCRIPT_KEEP_SECONDS = 7 * 24 * 3600
+TRANSCRIPT_PRUNE_INTERVAL = 600  # seconds between idle-transcript sweeps
+TRANSCRIPT_WINDOW_MESSAGES = 20  # messages shown per page of a chat tab
+
+# Prompt token budgets per model and feature (estimated locally before sending)
+DEFAULT_PROMPT_TOKEN_BUDGET = 30_000
+PROMPT_TOKEN_BUDGETS = {
+    "gemini-2.5-flash": {
+        "default": 30_000,
+        "notes_qa": 8_000,
+        "general_chat": 8_000,
+        "summary": 30_000,  # notes over this are map-reduced in several calls
+    },
+}
+
+# Per-call LLM metrics: sidebar percentiles window and Prometheus text export
+METRICS_WINDOW = 500
+METRICS_PATH = os.path.join("notes", ".metrics", "llm_metrics.prom")
+METRICS_EXPORT_INTERVAL = 5.0
+
+# Shared models, note texts and indexes (all sessions); unused ones are dropped past this size
+RESOURCE_REGISTRY_MAX_BYTES = 512 * 2**20
+
+# Notes library: documents searched in parallel for cross-document Q&A
+LIBRARY_SEARCH_WORKERS = 4
+
+# Background jobs (summaries, quizzes): worker threads for the whole server, and how long results are kept
+JOB_WORKERS = 4
+JOB_KEEP_SECONDS = 3600
+JOB_INLINE_WAIT = 0.3  # a click waits this long before polling; jobs answered from caches finish within it
+
+# Precomputation after an upload (index, summaries for every detail level, MCQ pools), at low priority.
+# It spends API quota on results the student may never ask for, so it is off unless
+# PRECOMPUTE_ON_INGEST=1 is set in the environment.
+PRECOMPUTE_ON_INGEST = False
+PRECOMPUTE_WORKERS = 1
+PRECOMPUTE_QUIZ_DIFFICULTIES = ("Easy",)  # the quiz tab's default
+PRECOMPUTE_QUIZ_QUESTIONS = 10  # banked per difficulty; skipped if the bank already holds that many
+
+# LLM backend: "gemini" (live API) or "fake" (offline, deterministic; for benchmarks and load tests)
+LLM_BACKEND = "gemini"
+FAKE_LLM_TOKENS_PER_SECOND = 200.0
+FAKE_LLM_FIRST_TOKEN_LATENCY = 0.3
+FAKE_LLM_CHUNK_TOKENS = 20
+FAKE_LLM_RATE_LIMIT_EVERY = 0  # raise a 429 on every Nth call (0 = never)
+FAKE_LLM_RATE_LIMIT_RATE = 0.0  # ...or on this fraction of calls
+
+# Static assets read once per server process
+STYLES_PATH = os.path.join("assets", "styles.css")
+
+_environment_ready = False
+_environment_lock = threading.Lock()
+
 def init_environment():
-    """Load API key and configure Streamlit & Gemini."""
-    load_dotenv()
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise RuntimeError("GOOGLE_API_KEY not found in .env file.")
-    genai.configure(api_key=api_key)
-    st.set_page_config(page_title="AI Study Assistant", page_icon="📘", layout="wide")
+    """Load .env and check the API key, once per server process.
+
+    Gemini itself is configured lazily by core.llm_backend on the first
+    call (no key needed with LLM_BACKEND=fake).
+    """
+    global _environment_ready
+    if _environment_ready:
+        return
+    with _environment_lock:
+        if _environment_ready:
+            return
+        load_dotenv()
+        if os.getenv("LLM_BACKEND", LLM_BACKEND) == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+            raise RuntimeError("GOOGLE_API_KEY not found in .env file.")
+        _environment_ready = True
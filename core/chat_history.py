@@ -0,0 +1,115 @@
+# core/chat_history.py
+from config.settings import CHAT_HISTORY_TOKENS, CHAT_HISTORY_SUMMARY
+from core.prompt_budget import estimate_tokens
+from core.llm_backend import shared_model
+
+COMPACT_PROMPT = """
+Update the running summary of a study conversation with the turns below.
+Keep facts the student learned, open questions and preferences; be brief.
+
+Current summary:
+{summary}
+
+Turns:
+{turns}
+
+Updated summary:
+"""
+
+
+class _RecordedResponse:
+    """Wraps a (streaming) response and reports the full reply text once consumed."""
+
+    def __init__(self, response, on_done):
+        self.response = response
+        self.on_done = on_done
+
+    def __iter__(self):
+        parts = []
+        for chunk in self.response:
+            text = getattr(chunk, "text", None)
+            if text:
+                parts.append(text)
+            yield chunk
+        self.on_done("".join(parts))
+
+    @property
+    def text(self):
+        return self.response.text
+
+
+class BoundedChat:
+    """Drop-in for a Gemini chat session (on any backend) whose request size stays flat.
+
+    Only the newest turns that fit `budget_tokens` are sent along with
+    each new message. Callers can store a shorter `history_text` for a
+    turn (e.g. the bare question instead of question + retrieved notes),
+    so old retrieved contexts are never re-sent. With `summarize=True` the turns
+    that fall out of the window are compacted into a running summary.
+    """
+
+    def __init__(self, model_name, budget_tokens=CHAT_HISTORY_TOKENS, summarize=CHAT_HISTORY_SUMMARY,
+                 compact=None):
+        self.model_name = model_name
+        self._model = None  # shared model handle, taken on the first message
+        self.budget_tokens = budget_tokens
+        self.summarize = summarize
+        self.compact = compact  # callable(prompt) -> text, used when summarize is on
+        self.turns = []  # [(role, text)], role is "user" or "model"
+        self.summary = ""
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = shared_model(self.model_name)
+        return self._model.value
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
+
+    def _window_start(self):
+        """Index of the oldest turn that still fits the history budget (whole user/model pairs)."""
+        used = estimate_tokens(self.summary) if self.summary else 0
+        start = len(self.turns)
+        while start >= 2:
+            pair = estimate_tokens(self.turns[start - 2][1]) + estimate_tokens(self.turns[start - 1][1])
+            if used + pair > self.budget_tokens:
+                break
+            used += pair
+            start -= 2
+        return start
+
+    def _evict(self, start):
+        """Forget turns before `start`, folding them into the summary if enabled."""
+        dropped, self.turns = self.turns[:start], self.turns[start:]
+        if dropped and self.summarize and self.compact:
+            turns = "\n".join(f"{role}: {text}" for role, text in dropped)
+            try:
+                self.summary = self.compact(COMPACT_PROMPT.format(summary=self.summary or "(none)", turns=turns))
+            except Exception:
+                pass  # a stale summary is better than failing the student's question
+
+    def contents(self, prompt):
+        """Request contents: summary, history window, then the new prompt."""
+        self._evict(self._window_start())
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our earlier conversation:\n{self.summary}"]})
+            contents.append({"role": "model", "parts": ["Got it."]})
+        contents += [{"role": role, "parts": [text]} for role, text in self.turns]
+        contents.append({"role": "user", "parts": [prompt]})
+        return contents
+
+    def send_message(self, prompt, stream=False, history_text=None):
+        response = self.model.generate_content(self.contents(prompt), stream=stream)
+        remembered = history_text if history_text is not None else prompt
+
+        def record(reply):
+            if reply:
+                self.turns += [("user", remembered), ("model", reply)]
+
+        if stream:
+            return _RecordedResponse(response, record)
+        record(response.text)
+        return response
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 import streamlit as st
 
 NOTES_DIR = "notes"
@@ -8,10 +9,14 @@ def ensure_notes_dir():
     if not os.path.exists(NOTES_DIR):
         os.makedirs(NOTES_DIR)
 
+def notes_path(filename: str = "latest_notes.txt"):
+    """Path of a saved notes file inside the notes directory."""
+    return os.path.join(NOTES_DIR, filename)
+
 def save_notes(content: str, filename: str = "latest_notes.txt"):
     """Save uploaded notes text locally."""
     ensure_notes_dir()
-    path = os.path.join(NOTES_DIR, filename)
+    path = notes_path(filename)
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
     st.session_state["last_saved_file"] = path
@@ -19,8 +24,14 @@ def save_notes(content: str, filename: str = "latest_notes.txt"):
 
 def load_last_notes():
     """Load last saved notes file if exists."""
-    path = os.path.join(NOTES_DIR, "latest_notes.txt")
+    path = notes_path()
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     return ""
+
+@lru_cache(maxsize=None)
+def read_styles(path: str):
+    """CSS file contents, read from disk once per server process (UTF-8 for emoji)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
@@ -1,41 +1,268 @@
 # core/gemini_utils.py
 import time
 import streamlit as st
-import google.generativeai as genai
+from config.settings import MODEL_NAME, STREAM_FLUSH_INTERVAL, STREAM_FLUSH_CHARS, RATE_LIMIT_RETRIES
+from core.rate_limiter import get_rate_limiter, is_rate_limit_error, backoff_delay
+from core.response_cache import get_response_cache, response_key
+from core.session_utils import current_session_id
+from core.chat_history import BoundedChat
+from core.prompt_budget import estimate_tokens, get_usage_log
+from core.metrics import get_metrics
+from core.jobs import JobCancelled
+from core.llm_backend import shared_model
+
+def new_chat_session(model_name):
+    """History-bounded chat session; old turns can be compacted via the shared limiter."""
+    session_id = current_session_id()
+    return BoundedChat(model_name, compact=lambda prompt: generate_text(prompt, session_id, model_name,
+                                                                        feature="history_compact"))
 
 def ensure_chat_sessions(model_name):
     """Initialize chat sessions for general and notes chat."""
     if "base_chat" not in st.session_state:
-        st.session_state.base_chat = genai.GenerativeModel(model_name).start_chat(history=[])
+        st.session_state.base_chat = new_chat_session(model_name)
     if "notes_chat" not in st.session_state:
-        st.session_state.notes_chat = genai.GenerativeModel(model_name).start_chat(history=[])
+        st.session_state.notes_chat = new_chat_session(model_name)
+
+class OneShotChat:
+    """Chat-like wrapper whose send_message() carries no history between calls."""
+
+    def __init__(self, model_name):
+        self.model = shared_model(model_name)
+
+    def send_message(self, prompt, stream=False):
+        return self.model.value.generate_content(prompt, stream=stream)
 
-def rate_limited_send(chat, prompt: str, stream=True, min_interval=2.0):
-    now = time.time()
-    delta = now - st.session_state.get("last_call_time", 0.0)
-    if delta < min_interval:
-        time.sleep(min_interval - delta)
+def rate_limited_send(chat, prompt: str, stream=True, on_wait=None, timings=None, session_id=None,
+                      history_text=None):
+    """Send through the process-wide rate limiter, backing off and retrying on 429s.
+
+    on_wait(sessions_ahead, waited_seconds) is called while queued; the total
+    queue wait is stored in timings["queue_wait"] when a dict is passed.
+    Worker threads have no Streamlit context and must pass session_id.
+    history_text is forwarded to BoundedChat sessions (what to remember for this turn).
+    """
+    send_kwargs = {"history_text": history_text} if history_text is not None else {}
+    limiter = get_rate_limiter()
+    session_id = session_id or current_session_id()
+    queue_wait = 0.0
     try:
-        resp = chat.send_message(prompt, stream=stream)
-        return resp
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            queue_wait += limiter.acquire(session_id, estimate_tokens(prompt), on_wait=on_wait)
+            try:
+                return chat.send_message(prompt, stream=stream, **send_kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                # Everyone shares the quota, so everyone backs off
+                limiter.penalize(backoff_delay(attempt))
     finally:
-        st.session_state["last_call_time"] = time.time()
+        if timings is not None:
+            timings["queue_wait"] = round(queue_wait, 3)
+
+class StreamRenderer:
+    """Collects streamed text and redraws its container on a throttle.
+
+    Chunks are buffered in a list and only joined when the UI is redrawn,
+    which happens when `interval` seconds have passed or `flush_chars` new
+    characters are waiting. Call finish() for the final redraw.
+    """
+
+    def __init__(self, container, interval=STREAM_FLUSH_INTERVAL, flush_chars=STREAM_FLUSH_CHARS):
+        self.container = container
+        self.interval = interval
+        self.flush_chars = flush_chars
+        self.parts = []
+        self.pending_chars = 0
+        self.chunks = 0
+        self.flushes = 0
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.last_flush = self.started
+
+    def write(self, text):
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.parts.append(text)
+        self.chunks += 1
+        self.pending_chars += len(text)
+        if now - self.last_flush >= self.interval or self.pending_chars >= self.flush_chars:
+            self.flush(now)
+
+    def flush(self, now=None):
+        self.container.markdown("".join(self.parts))
+        self.pending_chars = 0
+        self.flushes += 1
+        self.last_flush = now or time.perf_counter()
+
+    def finish(self):
+        """Final redraw (if anything is still pending); returns the full text."""
+        if self.pending_chars:
+            self.flush()
+        return "".join(self.parts)
+
+    def stats(self):
+        end = time.perf_counter()
+        return {
+            "ttft": round(self.first_token_at - self.started, 3) if self.first_token_at else None,
+            "total": round(end - self.started, 3),
+            "chunks": self.chunks,
+            "chars": sum(len(p) for p in self.parts),
+            "flushes": self.flushes,
+        }
+
+def replay_cached(renderer, text, piece_chars=80):
+    """Feed a cached answer through the renderer as if it were streaming."""
+    for start in range(0, len(text), piece_chars):
+        renderer.write(text[start:start + piece_chars])
+    return renderer.finish()
+
+def record_call(feature, prompt, reply="", usage=None, queue_wait=0.0, ttft=None, latency=0.0,
+                chunks=0, cache_hit=False, error=None):
+    """Log token usage and per-call metrics for one LLM call (or cache replay).
+
+    A call stopped by its job's cancellation (JobCancelled) is recorded as
+    cancelled, not as an error.
+    """
+    cancelled = isinstance(error, JobCancelled)
+    if cancelled:
+        error = None
+    prompt_tokens = response_tokens = 0
+    if not cache_hit and error is None and not cancelled:
+        prompt_tokens, response_tokens = get_usage_log().record(feature, prompt, reply, usage)
+    get_metrics().record(
+        feature, queue_wait=queue_wait, ttft=ttft, latency=latency, chunks=chunks,
+        prompt_chars=len(prompt), response_chars=len(reply), prompt_tokens=prompt_tokens,
+        response_tokens=response_tokens, cache_hit=cache_hit,
+        error=type(error).__name__ if error is not None else None, cancelled=cancelled,
+    )
+
+def stream_and_accumulate(chat, prompt: str, cache_key=None, history_text=None, feature="chat"):
+    """Stream the Gemini model's response live to Streamlit.
+
+    With a cache_key (see core.response_cache.response_key) a previous
+    answer is replayed instead of calling the API, and new answers are stored.
+    history_text is what a BoundedChat remembers for this turn instead of the prompt.
+    The call is recorded in the usage log and metrics under `feature`.
+    """
+    status = st.empty()
+    renderer = StreamRenderer(st.empty())
+    timings = {}
+
+    cache = get_response_cache() if cache_key else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        timings["cache_hit"] = cached is not None
+        if cached is not None:
+            text = replay_cached(renderer, cached)
+            stats = renderer.stats()
+            st.session_state["last_stream_stats"] = dict(stats, **timings)
+            record_call(feature, prompt, text, ttft=stats["ttft"], latency=stats["total"],
+                        chunks=stats["chunks"], cache_hit=True)
+            return text.strip()
+
+    def show_wait(ahead, waited):
+        who = f"{ahead} other session(s) ahead" if ahead else "next in line"
+        status.caption(f"⏳ Waiting for the shared API quota — {who}, {waited:.0f}s so far")
 
-def stream_and_accumulate(chat, prompt: str):
-    """Stream the Gemini model's response live to Streamlit."""
     try:
-        stream = rate_limited_send(chat, prompt, stream=True)
-        full_text = ""
-        container = st.empty()
+        stream = rate_limited_send(chat, prompt, stream=True, on_wait=show_wait, timings=timings,
+                                   history_text=history_text)
+        status.empty()
+        renderer.started += timings["queue_wait"]  # time-to-first-token excludes queueing
+        usage = None
         for chunk in stream:
+            usage = getattr(chunk, "usage_metadata", None) or usage
             if hasattr(chunk, "text") and chunk.text:
-                full_text += chunk.text
-                container.markdown(full_text)
-        return full_text.strip()
+                renderer.write(chunk.text)
+        reply = renderer.finish().strip()
+        stats = renderer.stats()
+        record_call(feature, prompt, reply, usage, queue_wait=timings["queue_wait"], ttft=stats["ttft"],
+                    latency=stats["total"], chunks=stats["chunks"])
+        if cache is not None:
+            cache.put(cache_key, reply)
+        return reply
     except Exception as e:
-        msg = str(e)
-        if "429" in msg:
+        status.empty()
+        renderer.finish()
+        record_call(feature, prompt, queue_wait=timings.get("queue_wait", 0.0),
+                    latency=renderer.stats()["total"], error=e)
+        if is_rate_limit_error(e):
             st.warning("⚠ Free-tier limit reached. Try again later.")
         else:
             st.error(f"Error: {e}")
-        return ""
\ No newline at end of file
+        return ""
+    finally:
+        st.session_state["last_stream_stats"] = dict(renderer.stats(), **timings)
+
+def generate_text(prompt: str, session_id, model_name=MODEL_NAME, feature="generate"):
+    """Blocking, history-free generation that is safe to call from worker threads.
+
+    Goes through the shared rate limiter and the response cache; makes no
+    Streamlit calls.
+    """
+    cache = get_response_cache()
+    key = response_key(model_name, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        record_call(feature, prompt, cached, cache_hit=True)
+        return cached
+    timings = {}
+    started = time.perf_counter()
+    try:
+        resp = rate_limited_send(OneShotChat(model_name), prompt, stream=False, session_id=session_id,
+                                 timings=timings)
+        text = (resp.text or "").strip()
+    except Exception as e:
+        queue_wait = timings.get("queue_wait", 0.0)
+        record_call(feature, prompt, queue_wait=queue_wait,
+                    latency=time.perf_counter() - started - queue_wait, error=e)
+        raise
+    latency = time.perf_counter() - started - timings["queue_wait"]
+    record_call(feature, prompt, text, getattr(resp, "usage_metadata", None), queue_wait=timings["queue_wait"],
+                ttft=latency, latency=latency, chunks=1)
+    cache.put(key, text)
+    return text
+
+def stream_text(prompt: str, session_id, on_text=None, model_name=MODEL_NAME, feature="generate",
+                cache_key=None):
+    """Streaming, history-free generation for background threads (no Streamlit calls).
+
+    on_text(piece) is called for every streamed piece; returns the full text.
+    With a cache_key a stored answer is passed to on_text in one piece
+    instead of calling the API, and new answers are stored.
+    """
+    cache = get_response_cache() if cache_key else None
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        if on_text:
+            on_text(cached)
+        record_call(feature, prompt, cached, cache_hit=True)
+        return cached
+    timings, parts, usage, first_at = {}, [], None, None
+    started = time.perf_counter()
+    try:
+        stream = rate_limited_send(OneShotChat(model_name), prompt, stream=True, session_id=session_id,
+                                   timings=timings)
+        for chunk in stream:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = getattr(chunk, "text", None)
+            if text:
+                first_at = first_at or time.perf_counter()
+                parts.append(text)
+                if on_text:
+                    on_text(text)
+    except Exception as e:
+        queue_wait = timings.get("queue_wait", 0.0)
+        record_call(feature, prompt, "".join(parts), queue_wait=queue_wait,
+                    latency=time.perf_counter() - started - queue_wait, chunks=len(parts), error=e)
+        raise
+    queue_wait = timings["queue_wait"]
+    reply = "".join(parts)
+    record_call(feature, prompt, reply, usage, queue_wait=queue_wait,
+                ttft=first_at - started - queue_wait if first_at else None,
+                latency=time.perf_counter() - started - queue_wait, chunks=len(parts))
+    if cache is not None and reply.strip():
+        cache.put(cache_key, reply.strip())
+    return reply
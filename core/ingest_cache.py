@@ -0,0 +1,100 @@
+# core/ingest_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("notes", ".ingest_cache")
+MAX_MEMORY_ENTRIES = 8
+
+
+def content_hash(data: bytes):
+    """Key an upload by its bytes, not its file name."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class IngestCache:
+    """Extraction results by content hash: in-memory LRU over a JSON disk tier."""
+
+    def __init__(self, max_entries=MAX_MEMORY_ENTRIES, cache_dir=CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        self._remember(key, result)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            pass  # the memory tier still serves this process
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = IngestCache()
+
+
+def get_ingest_cache():
+    return _cache
+
+
+def extract_text_upload(data: bytes):
+    """Decode a .txt upload (PDFs stream in through core.ingest_pipeline instead)."""
+    started = time.perf_counter()
+    text = data.decode("utf-8", errors="ignore")
+    return {
+        "text": text,
+        "page_offsets": [0],
+        "stats": {
+            "pages": 1,
+            "chars": len(text),
+            "words": len(text.split()),
+            "bytes": len(data),
+            "extract_seconds": round(time.perf_counter() - started, 3),
+        },
+    }
+
+
+def lookup_upload(data: bytes):
+    """Return (key, cached result or None) for an uploaded file's bytes."""
+    key = content_hash(data)
+    return key, _cache.get(key)
+
+
+def ingest_text_upload(data: bytes):
+    """Return (key, result, cache_hit) for an uploaded .txt file's bytes."""
+    key, result = lookup_upload(data)
+    if result is not None:
+        return key, result, True
+    result = extract_text_upload(data)
+    if result["text"]:
+        _cache.put(key, result)
+    return key, result, False
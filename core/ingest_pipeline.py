@@ -0,0 +1,163 @@
+# core/ingest_pipeline.py
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from core.file_utils import ensure_notes_dir, notes_path
+from core.ingest_cache import get_ingest_cache
+from core.notes_library import get_notes_library
+from core.pdf_utils import count_pdf_pages, iter_pdf_pages
+from core.search_index import BM25Index, set_notes_index, share_index
+from core.session_utils import set_notes_text, student_id
+from core.text_utils import ChunkStream
+
+
+class StreamingIngest:
+    """Pages in; joined text, chunks and index postings out, one page at a time.
+
+    The text written to `out`, the chunks and the index version are exactly
+    what join_pages / split_into_chunks / BM25Index.from_text would produce
+    for the whole document. The joined text is never built in memory, but
+    the index keeps every finished chunk string (so the pages read so far
+    can be searched) until finish_ingest_job swaps them for offsets into
+    the saved notes.
+    """
+
+    def __init__(self, index=None, max_chars=8000, overlap=300):
+        self.index = index if index is not None else BM25Index()
+        self.chunker = ChunkStream(max_chars, overlap)
+        self.digest = hashlib.sha1()
+        self.page_offsets = []
+        self.chars = 0
+        self.words = 0
+
+    def run(self, pages, out):
+        """Generator: consume cleaned page texts, yield the page count after each."""
+        for page in pages:
+            piece = "\n\n" + page if page and self.chars else page
+            self.page_offsets.append(self.chars + len(piece) - len(page))
+            if piece:
+                out.write(piece)
+                self.digest.update(piece.encode("utf-8"))
+                self.chars += len(piece)
+                self.words += len(page.split())
+            for chunk in self.chunker.feed(piece):
+                self.index.add_chunk(chunk)
+            yield len(self.page_offsets)
+        for chunk in self.chunker.close():
+            self.index.add_chunk(chunk)
+        self.index.version = self.digest.hexdigest()
+
+
+class IngestJob:
+    """Streams one uploaded PDF into the notes file and index on a background thread.
+
+    The partial index is searchable while pages are still being read.
+    """
+
+    def __init__(self, key, data, dest_path=None, name=None):
+        self.key = key
+        self.name = name or "Uploaded PDF"
+        self.dest_path = dest_path or notes_path()
+        self.ingest = StreamingIngest()
+        self.total_pages = None
+        self.error = None
+        self.text = None  # the full notes text, read back from this job's own file once done
+        self.started = time.perf_counter()
+        self.seconds = None
+        self._data = data
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ingest-{key[:8]}", daemon=True)
+
+    @property
+    def index(self):
+        return self.ingest.index
+
+    @property
+    def pages_done(self):
+        return len(self.ingest.page_offsets)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        ensure_notes_dir()
+        # Each job has its own temp file: a cancelled job may still be writing when the next starts
+        tmp_path = f"{self.dest_path}.{uuid.uuid4().hex}.part"
+        try:
+            self.total_pages = count_pdf_pages(self._data)
+            pages = iter_pdf_pages(self._data, total=self.total_pages)
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                for _ in self.ingest.run(pages, out):
+                    if self._cancel.is_set():
+                        pages.close()
+                        return
+            with open(tmp_path, "r", encoding="utf-8") as f:
+                self.text = f.read()
+            # The previous notes file stays valid until the new one is complete.
+            os.replace(tmp_path, self.dest_path)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._data = None
+            self.seconds = time.perf_counter() - self.started
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        return {
+            "pages": self.pages_done,
+            "chars": self.ingest.chars,
+            "words": self.ingest.words,
+            "extract_seconds": round(self.seconds or 0.0, 3),
+        }
+
+
+def start_ingest_job(key, data, name=None):
+    """Start streaming a PDF upload, cancelling any ingest already running."""
+    cancel_ingest_job()
+    job = IngestJob(key, data, name=name).start()
+    st.session_state.notes_ingest_job = job
+    st.session_state.notes_ingest_error = None
+    return job
+
+
+def cancel_ingest_job():
+    """Stop the session's running ingest; its notes were replaced (new upload or Clear Notes)."""
+    job = st.session_state.get("notes_ingest_job")
+    if job is not None:
+        job.cancel()
+    st.session_state.notes_ingest_job = None
+
+
+def finish_ingest_job(job):
+    """Move a finished job's text and index into session state; True on success."""
+    st.session_state.notes_ingest_job = None
+    if job.error is not None or not job.ingest.chars:
+        st.session_state.notes_ingest_error = str(job.error or "no text found in the PDF")
+        return False
+    st.session_state.notes_ingest_error = None
+    # This job's own text: the shared notes file may already hold another session's upload
+    text = set_notes_text(job.text)
+    job.text = None
+    st.session_state.notes_upload_key = job.key
+    st.session_state.last_saved_file = job.dest_path
+    job.index.attach_text(text)
+    set_notes_index(share_index(job.index.version, lambda: job.index), text)
+    stats = job.stats()
+    st.session_state.notes_ingest = dict(stats, cache_hit=False)
+    get_ingest_cache().put(job.key, {"text": text, "page_offsets": job.ingest.page_offsets, "stats": stats})
+    get_notes_library().add(job.name, text, student_id(), stats)
+    return True
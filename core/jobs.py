@@ -0,0 +1,159 @@
+# core/jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+
+from config.settings import JOB_WORKERS, JOB_KEEP_SECONDS, JOB_INLINE_WAIT
+from core.session_utils import current_session_id
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function once its job has been cancelled."""
+
+
+class Job:
+    """One unit of background work and everything the UI polls about it.
+
+    The job function receives the Job and calls report()/append() to
+    publish progress and streamed text, and check() between steps so a
+    cancel takes effect.
+    """
+
+    def __init__(self, kind, label, session_id):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.label = label
+        self.session_id = session_id
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a free worker…"
+        self.partial = ""  # text streamed so far
+        self.sections = []  # intermediate results worth showing (e.g. section summaries)
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def running(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def report(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = min(1.0, max(0.0, progress))
+        if message is not None:
+            self.message = message
+
+    def append(self, text):
+        self.check()
+        self.partial += text
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED)  # never started
+
+    def wait(self, timeout=JOB_INLINE_WAIT):
+        """Block up to `timeout` seconds for the job to end; True if it has."""
+        if self.future is not None:
+            wait([self.future], timeout=timeout)
+        return not self.running
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = time.time()
+
+
+class JobExecutor:
+    """Bounded worker pool for summaries and quizzes, shared by every session.
+
+    Jobs live here rather than in the script, so reruns, tab switches and
+    new uploads do not lose them; sessions keep only job ids. Finished
+    jobs are kept for `keep_seconds`.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, keep_seconds=JOB_KEEP_SECONDS):
+        self.keep_seconds = keep_seconds
+        self.jobs = {}  # id -> Job
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    def submit(self, kind, label, session_id, fn, *args, **kwargs):
+        """Queue fn(job, *args, **kwargs); its return value becomes job.result."""
+        job = Job(kind, label, session_id)
+        with self._lock:
+            self._prune()
+            self.jobs[job.id] = job
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        job.message = ""
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job._finish(DONE)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job.error = e
+            job._finish(CANCELLED if job.cancelled else FAILED)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def stats(self, session_id=None):
+        with self._lock:
+            jobs = [j for j in self.jobs.values() if session_id is None or j.session_id == session_id]
+        return {status: sum(j.status == status for j in jobs) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+_executor = JobExecutor()
+
+
+def get_job_executor():
+    return _executor
+
+
+def submit_session_job(slot, kind, label, fn, *args, **kwargs):
+    """Start a job for this session under `slot`, cancelling the one it replaces."""
+    previous = session_job(slot)
+    if previous is not None and previous.running:
+        previous.cancel()
+    job = _executor.submit(kind, label, current_session_id(), fn, *args, **kwargs)
+    st.session_state.setdefault("jobs", {})[slot] = job.id
+    return job
+
+
+def session_job(slot):
+    """This session's job in `slot`, if it is still known to the executor."""
+    job_id = st.session_state.get("jobs", {}).get(slot)
+    return _executor.get(job_id) if job_id else None
+
+
+def forget_session_job(slot):
+    st.session_state.get("jobs", {}).pop(slot, None)
@@ -0,0 +1,204 @@
+# core/llm_backend.py
+"""Where model calls actually go.
+
+A backend hands out models with Gemini's `generate_content(contents,
+stream=False)` interface; everything above (chat sessions, the rate
+limiter, caching, metrics) is backend-agnostic. `GeminiBackend` talks to
+the live API; `FakeBackend` answers locally and deterministically so the
+app can be benchmarked and load-tested without an API key.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from config.settings import (
+    LLM_BACKEND, FAKE_LLM_TOKENS_PER_SECOND, FAKE_LLM_FIRST_TOKEN_LATENCY, FAKE_LLM_CHUNK_TOKENS,
+    FAKE_LLM_RATE_LIMIT_EVERY, FAKE_LLM_RATE_LIMIT_RATE,
+)
+from core.prompt_budget import estimate_tokens
+from core.resource_registry import get_resource_registry
+
+
+class GeminiBackend:
+    """Live Gemini API; the SDK (slow to import) is loaded and configured on first use."""
+
+    name = "gemini"
+
+    def __init__(self):
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._genai = genai
+            return self._genai
+
+    def model(self, model_name):
+        return self.client().GenerativeModel(model_name)
+
+
+class ResourceExhausted(Exception):
+    """Stand-in for google.api_core's 429 error (caught by is_rate_limit_error)."""
+
+
+QUIZ_COUNT_RE = re.compile(r"generate (\d+) multiple-choice", re.IGNORECASE)
+FAKE_WORD_RE = re.compile(r"[A-Za-z]{4,}")
+
+
+def prompt_text(contents):
+    """The newest user text in a generate_content() payload (str or chat contents)."""
+    if isinstance(contents, str):
+        return contents
+    for message in reversed(contents):
+        if isinstance(message, dict) and message.get("role") == "user":
+            return " ".join(str(p) for p in message.get("parts", []))
+    return str(contents)
+
+
+def fake_reply(prompt, rng, reply_tokens=120):
+    """Templated reply shaped like what the app expects for this kind of prompt."""
+    words = FAKE_WORD_RE.findall(prompt[-4000:]) or ["notes", "study", "topic", "answer"]
+
+    def phrase(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    quiz = QUIZ_COUNT_RE.search(prompt)
+    if quiz:
+        blocks = []
+        for i in range(1, int(quiz.group(1)) + 1):
+            options = "\n".join(f"{letter}) {phrase(3)}" for letter in "ABCD")
+            blocks.append(f"Q{i}. What does {phrase(4)} describe?\n{options}\nAnswer: {rng.choice('ABCD')}")
+        return "\n\n".join(blocks)
+    if "summar" in prompt.lower():
+        return "\n".join(f"- {phrase(10).capitalize()}." for _ in range(max(1, reply_tokens // 15)))
+    sentences = [f"{phrase(12).capitalize()}." for _ in range(max(1, reply_tokens // 15))]
+    return "Based on your notes: " + " ".join(sentences)
+
+
+class FakeResponse:
+    """Iterable of chunks with .text, like a streamed Gemini response; .text joins them."""
+
+    def __init__(self, pieces, usage, first_token_latency, seconds_per_piece):
+        self.pieces = pieces
+        self.usage_metadata = usage
+        self.first_token_latency = first_token_latency
+        self.seconds_per_piece = seconds_per_piece
+
+    def __iter__(self):
+        time.sleep(self.first_token_latency)
+        for i, piece in enumerate(self.pieces):
+            if i:
+                time.sleep(self.seconds_per_piece)
+            last = i == len(self.pieces) - 1
+            yield SimpleNamespace(text=piece, usage_metadata=self.usage_metadata if last else None)
+
+    @property
+    def text(self):
+        return "".join(self.pieces)
+
+
+class FakeModel:
+    def __init__(self, backend, model_name):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream=False):
+        return self.backend.generate(prompt_text(contents), stream)
+
+
+class FakeBackend:
+    """Offline model that streams templated replies at a configurable pace.
+
+    Replies are seeded from the prompt, so the same prompt always gets the
+    same text. A 429 is raised on every `rate_limit_every`-th call and, with
+    probability `rate_limit_rate`, on any call (from a seeded generator).
+    `responses` may be a callable(prompt) -> text to override the templates.
+    """
+
+    name = "fake"
+
+    def __init__(self, tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+                 first_token_latency=FAKE_LLM_FIRST_TOKEN_LATENCY, chunk_tokens=FAKE_LLM_CHUNK_TOKENS,
+                 rate_limit_every=FAKE_LLM_RATE_LIMIT_EVERY, rate_limit_rate=FAKE_LLM_RATE_LIMIT_RATE,
+                 reply_tokens=120, responses=None, seed=0):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.chunk_tokens = chunk_tokens
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_rate = rate_limit_rate
+        self.reply_tokens = reply_tokens
+        self.responses = responses
+        self.seed = seed
+        self.calls = 0
+        self.rate_limited = 0
+        self._errors = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def model(self, model_name):
+        return FakeModel(self, model_name)
+
+    def generate(self, prompt, stream):
+        with self._lock:
+            self.calls += 1
+            fail = (self.rate_limit_every and self.calls % self.rate_limit_every == 0) or \
+                self._errors.random() < self.rate_limit_rate
+            self.rate_limited += int(bool(fail))
+        if fail:
+            raise ResourceExhausted("429 Resource has been exhausted (fake backend)")
+
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+        text = self.responses(prompt) if self.responses else fake_reply(prompt, rng, self.reply_tokens)
+        piece_chars = max(1, self.chunk_tokens * 4)
+        pieces = [text[i:i + piece_chars] for i in range(0, len(text), piece_chars)] or [""]
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt),
+                                candidates_token_count=estimate_tokens(text))
+        seconds_per_piece = self.chunk_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        if stream:
+            return FakeResponse(pieces, usage, self.first_token_latency, seconds_per_piece)
+        time.sleep(self.first_token_latency + seconds_per_piece * (len(pieces) - 1))
+        return FakeResponse(pieces, usage, 0.0, 0.0)
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "rate_limited": self.rate_limited}
+
+
+BACKENDS = {"gemini": GeminiBackend, "fake": FakeBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Process-wide backend, chosen by the LLM_BACKEND env var / setting on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.getenv("LLM_BACKEND", LLM_BACKEND)
+            if name not in BACKENDS:
+                raise RuntimeError(f"Unknown LLM_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}.")
+            _backend = BACKENDS[name]()
+        return _backend
+
+
+def shared_model(model_name):
+    """Handle to the one model object per backend and model name that all sessions share."""
+    backend = get_backend()
+    return get_resource_registry().acquire(f"model:{backend.name}:{id(backend)}:{model_name}",
+                                           lambda: backend.model(model_name), size_of=lambda model: 0)
+
+
+def set_backend(backend):
+    """Swap the backend (e.g. a configured FakeBackend in a load test); returns it."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+    return backend
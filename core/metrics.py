@@ -0,0 +1,150 @@
+# core/metrics.py
+import os
+import threading
+import time
+from collections import deque
+
+from config.settings import METRICS_PATH, METRICS_WINDOW, METRICS_EXPORT_INTERVAL
+
+FIELDS = ("queue_wait", "ttft", "latency")
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class LLMMetrics:
+    """Per-call records for every Gemini call, with running counters and quantiles.
+
+    Recent calls (a bounded window) feed the sidebar percentiles; totals
+    since start-up feed the Prometheus text export. Calls abandoned because
+    their job was cancelled are counted apart from errors.
+    """
+
+    def __init__(self, window=METRICS_WINDOW, path=METRICS_PATH, export_interval=METRICS_EXPORT_INTERVAL):
+        self.recent = deque(maxlen=window)
+        self.path = path
+        self.export_interval = export_interval
+        self.totals = {}  # feature -> counters and sums
+        self.errors = {}  # (feature, error class) -> count
+        self._last_export = 0.0
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def record(self, feature, queue_wait=0.0, ttft=None, latency=0.0, chunks=0, prompt_chars=0,
+               response_chars=0, prompt_tokens=0, response_tokens=0, cache_hit=False, error=None,
+               cancelled=False):
+        call = {
+            "feature": feature, "queue_wait": queue_wait, "ttft": ttft, "latency": latency,
+            "chunks": chunks, "prompt_chars": prompt_chars, "response_chars": response_chars,
+            "prompt_tokens": prompt_tokens, "response_tokens": response_tokens,
+            "cache_hit": cache_hit, "error": error, "cancelled": cancelled, "at": time.time(),
+        }
+        with self._lock:
+            self.recent.append(call)
+            row = self.totals.setdefault(feature, {
+                "calls": 0, "cache_hits": 0, "errors": 0, "cancelled": 0, "latency_sum": 0.0, "queue_wait_sum": 0.0,
+                "prompt_tokens": 0, "response_tokens": 0, "prompt_chars": 0, "response_chars": 0,
+            })
+            row["calls"] += 1
+            row["cache_hits"] += int(cache_hit)
+            row["errors"] += int(error is not None)
+            row["cancelled"] += int(cancelled)
+            row["latency_sum"] += latency
+            row["queue_wait_sum"] += queue_wait
+            row["prompt_tokens"] += prompt_tokens
+            row["response_tokens"] += response_tokens
+            row["prompt_chars"] += prompt_chars
+            row["response_chars"] += response_chars
+            if error is not None:
+                self.errors[(feature, error)] = self.errors.get((feature, error), 0) + 1
+        self.maybe_export()
+        return call
+
+    def summary(self):
+        """Per-feature percentiles over the recent window, for the sidebar panel."""
+        with self._lock:
+            calls = list(self.recent)
+        rows = []
+        for feature in sorted({c["feature"] for c in calls}):
+            mine = [c for c in calls if c["feature"] == feature]
+            row = {"feature": feature, "calls": len(mine)}
+            for field in FIELDS:
+                values = sorted(c[field] for c in mine if c[field] is not None and not c["cache_hit"])
+                row[f"p50 {field}"] = percentile(values, 0.5)
+                row[f"p90 {field}"] = percentile(values, 0.9)
+            row["cache hit %"] = round(100 * sum(c["cache_hit"] for c in mine) / len(mine))
+            row["errors"] = sum(c["error"] is not None for c in mine)
+            row["cancelled"] = sum(c["cancelled"] for c in mine)
+            row["avg prompt tok"] = round(sum(c["prompt_tokens"] for c in mine) / len(mine))
+            rows.append(row)
+        return rows
+
+    def prometheus_text(self):
+        with self._lock:
+            calls = list(self.recent)
+            totals = {f: dict(row) for f, row in self.totals.items()}
+            errors = dict(self.errors)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric("study_llm_calls_total", "counter", "LLM calls by feature.",
+               [({"feature": f}, r["calls"]) for f, r in totals.items()])
+        metric("study_llm_cache_hits_total", "counter", "LLM calls answered from the response cache.",
+               [({"feature": f}, r["cache_hits"]) for f, r in totals.items()])
+        metric("study_llm_errors_total", "counter", "Failed LLM calls by error class.",
+               [({"feature": f, "error": e}, n) for (f, e), n in errors.items()])
+        metric("study_llm_cancelled_total", "counter", "LLM calls abandoned because their job was cancelled.",
+               [({"feature": f}, r["cancelled"]) for f, r in totals.items()])
+        metric("study_llm_prompt_tokens_total", "counter", "Prompt tokens sent.",
+               [({"feature": f}, r["prompt_tokens"]) for f, r in totals.items()])
+        metric("study_llm_response_tokens_total", "counter", "Response tokens received.",
+               [({"feature": f}, r["response_tokens"]) for f, r in totals.items()])
+        for field in FIELDS:
+            samples = []
+            for feature in totals:
+                values = sorted(c[field] for c in calls
+                                if c["feature"] == feature and c[field] is not None and not c["cache_hit"])
+                for q in QUANTILES:
+                    value = percentile(values, q)
+                    if value is not None:
+                        samples.append(({"feature": feature, "quantile": q}, round(value, 4)))
+            metric(f"study_llm_{field}_seconds", "gauge",
+                   f"Recent {field.replace('_', ' ')} quantiles (last {self.recent.maxlen} calls).", samples)
+        return "\n".join(lines) + "\n"
+
+    def maybe_export(self, force=False):
+        """Write the Prometheus text file, at most once per export_interval."""
+        now = time.monotonic()
+        if not self.path or (not force and now - self._last_export < self.export_interval):
+            return
+        if not self._export_lock.acquire(blocking=False):
+            return  # another thread is writing the file right now
+        self._last_export = now
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+        finally:
+            self._export_lock.release()
+
+
+_metrics = LLMMetrics()
+
+
+def get_metrics():
+    return _metrics
@@ -0,0 +1,191 @@
+# core/notes_library.py
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import LIBRARY_SEARCH_WORKERS
+from core.file_utils import NOTES_DIR
+from core.resource_registry import get_resource_registry
+from core.search_index import BM25Index, notes_version, share_index, tokenize
+
+LIBRARY_DIR = os.path.join(NOTES_DIR, "library")
+
+
+class NotesLibrary:
+    """Every uploaded document, saved as its own text file plus a metadata catalog.
+
+    Documents are keyed by notes_version of their text, so uploading the
+    same notes twice keeps one copy. Each document lists its owners
+    (student ids, see session_utils.student_id) with the name and time
+    they uploaded it under; students only see and remove their own
+    documents, and the file goes once its last owner removes it. The
+    catalog (library.json) is rewritten atomically on every change.
+    """
+
+    def __init__(self, root=LIBRARY_DIR):
+        self.root = root
+        self.catalog_path = os.path.join(root, "library.json")
+        self._docs = None  # doc_id -> metadata, loaded on first use
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._docs is None:
+            try:
+                with open(self.catalog_path, "r", encoding="utf-8") as f:
+                    self._docs = {doc["id"]: doc for doc in json.load(f)}
+            except (OSError, ValueError):
+                self._docs = {}
+        return self._docs
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.catalog_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(list(self._docs.values()), f, indent=2)
+        os.replace(tmp, self.catalog_path)
+
+    def _text_path(self, doc_id):
+        return os.path.join(self.root, f"{doc_id}.txt")
+
+    @staticmethod
+    def _view(doc, owner):
+        """A document as one owner sees it (their name and upload time)."""
+        view = {k: v for k, v in doc.items() if k != "owners"}
+        view.update(doc["owners"][owner])
+        return view
+
+    def documents(self, owner):
+        """Metadata of the owner's documents, oldest upload first."""
+        with self._lock:
+            docs = [self._view(doc, owner) for doc in self._load().values() if owner in doc.get("owners", {})]
+        return sorted(docs, key=lambda doc: doc["added"])
+
+    def latest(self, owner):
+        """The owner's most recently uploaded document, or None."""
+        documents = self.documents(owner)
+        return documents[-1] if documents else None
+
+    def get(self, doc_id, owner):
+        with self._lock:
+            doc = self._load().get(doc_id)
+            return self._view(doc, owner) if doc and owner in doc.get("owners", {}) else None
+
+    def add(self, name, text, owner, stats=None):
+        """Save a document for `owner` (the text once per distinct text) and return its metadata."""
+        doc_id = notes_version(text)
+        with self._lock:
+            docs = self._load()
+            if doc_id not in docs:
+                os.makedirs(self.root, exist_ok=True)
+                tmp = self._text_path(doc_id) + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, self._text_path(doc_id))
+                stats = stats or {}
+                docs[doc_id] = {
+                    "id": doc_id,
+                    "chars": len(text),
+                    "words": stats.get("words", len(text.split())),
+                    "pages": stats.get("pages"),
+                    "owners": {},
+                }
+            owners = docs[doc_id].setdefault("owners", {})
+            if owner not in owners:
+                owners[owner] = {"name": name, "added": time.time()}
+            else:
+                owners[owner]["added"] = time.time()  # uploaded again: it is their latest notes
+            self._save()
+            return self._view(docs[doc_id], owner)
+
+    def remove(self, doc_id, owner):
+        """Remove the owner's copy; the text file goes with the last owner."""
+        with self._lock:
+            doc = self._load().get(doc_id)
+            if doc is None or doc.get("owners", {}).pop(owner, None) is None:
+                return
+            orphaned = not doc["owners"]
+            if orphaned:
+                del self._docs[doc_id]
+            self._save()
+        if orphaned:
+            try:
+                os.remove(self._text_path(doc_id))
+            except OSError:
+                pass
+
+    def read_text(self, doc_id):
+        with open(self._text_path(doc_id), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def open_document(self, doc_id):
+        """Shared (text handle, index handle) for a document; loaded and indexed once per process."""
+        registry = get_resource_registry()
+        doc = registry.acquire(f"doc:{doc_id}", lambda: self.read_text(doc_id), size_of=sys.getsizeof)
+        index = share_index(doc_id, lambda: BM25Index.from_text(doc.value, version=doc_id))
+        return doc, index
+
+
+def open_documents(library, doc_ids, opened=None, workers=LIBRARY_SEARCH_WORKERS):
+    """{doc_id: (text handle, index handle)} for doc_ids, reusing `opened` and loading the rest in parallel."""
+    opened = opened or {}
+    missing = [doc_id for doc_id in doc_ids if doc_id not in opened]
+    loaded = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing)), thread_name_prefix="library-open") as pool:
+            loaded = dict(zip(missing, pool.map(library.open_document, missing)))
+    return {doc_id: opened.get(doc_id) or loaded[doc_id] for doc_id in doc_ids}
+
+
+def corpus_stats(indexes, question):
+    """(chunk count, average chunk length, {term: doc freq}) over several indexes, for the question's terms."""
+    chunks = sum(len(index) for index in indexes)
+    total_len = sum(index.total_len for index in indexes)
+    dfs = {term: sum(index.doc_freq(term) for index in indexes) for term in set(tokenize(question))}
+    return chunks, (total_len / chunks if chunks else 0.0) or 1.0, dfs
+
+
+def search_documents(indexes, question, top_k=3, workers=LIBRARY_SEARCH_WORKERS):
+    """Global top_k over several per-document indexes, searched in parallel.
+
+    indexes is [(doc_id, BM25Index)] in display order; returns
+    [(doc_id, chunk_text)] best first. Every index scores with the
+    statistics of all of them together (chunk count, average chunk length,
+    document frequencies), as if they were one index, so scores compare
+    across documents. Ties go to the earlier document, then the earlier chunk.
+    When fewer than top_k chunks match, the rest come from the start of
+    the first documents, as BM25Index.top_chunks does for one document.
+    """
+    if not indexes:
+        return []
+    corpus = corpus_stats([index for _, index in indexes], question)
+    if len(indexes) == 1 or workers <= 1:
+        results = [index.search(question, top_k, corpus) for _, index in indexes]
+    else:
+        workers = min(workers, len(indexes))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="library-search") as pool:
+            results = list(pool.map(lambda item: item[1].search(question, top_k, corpus), indexes))
+    candidates = (
+        (-score, n, chunk_id)
+        for n, hits in enumerate(results)
+        for chunk_id, score in hits
+    )
+    best = [(n, chunk_id) for _, n, chunk_id in heapq.nsmallest(top_k, candidates)]
+    taken = set(best)
+    for n, (_, index) in enumerate(indexes):
+        for chunk_id in range(len(index)):
+            if len(best) >= top_k:
+                break
+            if (n, chunk_id) not in taken:
+                best.append((n, chunk_id))
+    return [(indexes[n][0], indexes[n][1].chunks[chunk_id]) for n, chunk_id in best]
+
+
+_library = NotesLibrary()
+
+
+def get_notes_library():
+    return _library
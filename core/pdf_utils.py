@@ -1,16 +1,116 @@
 # core/pdf_utils.py
+import io
+import math
+import multiprocessing
+import os
 import re
-import pdfplumber
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import streamlit as st
 
+# Below this many pages the process start-up costs more than it saves.
+PARALLEL_MIN_PAGES = 40
+# Each worker gets several small page ranges so progress updates stay smooth.
+RANGES_PER_WORKER = 4
+
+_worker_pdf_bytes = None
+
+def clean_page_text(text):
+    """Collapse runs of blank lines and trim one page of extracted text."""
+    return re.sub(r"\n{3,}", "\n\n", text or "").strip()
+
+def join_pages(pages):
+    """Join cleaned pages; returns (text, start offset of each page)."""
+    parts, offsets, pos = [], [], 0
+    for page in pages:
+        if page and parts:
+            pos += 2
+        offsets.append(pos)
+        if page:
+            parts.append(page)
+            pos += len(page)
+    return "\n\n".join(parts), offsets
+
+def _pdfplumber():
+    """pdfplumber is only needed once a PDF is uploaded, so keep it off the start-up path."""
+    import pdfplumber
+    return pdfplumber
+
+def iter_pages_serial(file):
+    """Yield cleaned page texts one at a time, releasing each page's layout cache."""
+    with _pdfplumber().open(file) as pdf:
+        for p in pdf.pages:
+            yield clean_page_text(p.extract_text())
+            p.close()
+
+def extract_pages_from_pdf(file):
+    """Extract the cleaned text of every page in a PDF."""
+    return list(iter_pages_serial(file))
+
+def count_pdf_pages(data: bytes):
+    with _pdfplumber().open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+def _init_worker(data):
+    global _worker_pdf_bytes
+    _worker_pdf_bytes = data
+
+def _extract_page_range(start, end):
+    """Worker side: open the PDF independently and extract pages [start, end)."""
+    with _pdfplumber().open(io.BytesIO(_worker_pdf_bytes)) as pdf:
+        return [clean_page_text(pdf.pages[i].extract_text()) for i in range(start, end)]
+
+def page_ranges(total, parts):
+    """Split range(total) into at most `parts` contiguous (start, end) pairs."""
+    size = max(1, math.ceil(total / max(1, parts)))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+def iter_pdf_pages(data: bytes, workers=None, min_pages=PARALLEL_MIN_PAGES, total=None):
+    """Yield cleaned page texts in page order, extracting across worker processes.
+
+    Small files (fewer than min_pages) and single-worker setups use the
+    serial path. Only a bounded window of page ranges is in flight at once,
+    so memory stays proportional to a few ranges, not the document.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = count_pdf_pages(data) if total is None else total
+    if workers < 2 or total < min_pages:
+        yield from iter_pages_serial(io.BytesIO(data))
+        return
+
+    ranges = iter(page_ranges(total, workers * RANGES_PER_WORKER))
+    # spawn, not fork: the Streamlit server process is multi-threaded
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                               initializer=_init_worker, initargs=(data,))
+    try:
+        pending = deque(pool.submit(_extract_page_range, *r) for r in islice(ranges, workers * 2))
+        while pending:
+            pages = pending.popleft().result()
+            nxt = next(ranges, None)
+            if nxt:
+                pending.append(pool.submit(_extract_page_range, *nxt))
+            yield from pages
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def extract_pages_parallel(data: bytes, workers=None, progress=None, min_pages=PARALLEL_MIN_PAGES):
+    """Extract every page (see iter_pdf_pages); progress(done_pages, total_pages) per page."""
+    total = count_pdf_pages(data)
+    pages = []
+    for page in iter_pdf_pages(data, workers=workers, min_pages=min_pages, total=total):
+        pages.append(page)
+        if progress:
+            progress(len(pages), total)
+    return pages
+
 def extract_text_from_pdf(file):
     """Extract and clean text from a PDF."""
     try:
-        with pdfplumber.open(file) as pdf:
-            pages = [p.extract_text() or "" for p in pdf.pages]
-        text = "\n\n".join(pages)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        return text.strip()
+        text, _ = join_pages(extract_pages_from_pdf(file))
+        return text
     except Exception as e:
         st.error(f"Failed to read PDF: {e}")
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,82 @@
+# core/precompute.py
+import os
+
+import streamlit as st
+
+from config.settings import (
+    PRECOMPUTE_ON_INGEST, PRECOMPUTE_WORKERS, PRECOMPUTE_QUIZ_DIFFICULTIES, PRECOMPUTE_QUIZ_QUESTIONS,
+)
+from core.gemini_utils import stream_text
+from core.jobs import JobExecutor
+from core.question_bank import get_question_bank
+from core.quiz_engine import generate_quiz
+from core.rate_limiter import background_session
+from core.search_index import BM25Index, notes_version, share_index
+from core.session_utils import current_session_id
+from core.summarizer import STYLE_MAP, single_prompt, summary_prompt
+from core.text_utils import ChunkTable
+
+
+def precompute_notes(job, notes_text, session_id):
+    """Background job (see core.jobs): everything the tabs would compute on their first click.
+
+    Builds the shared retrieval index, fills the response cache with the
+    summary of every detail level and tops up the question bank. LLM calls use
+    the session's background limiter key, so the student's own clicks
+    (and other sessions) are served first. Only summaries that take one
+    request are prepared; notes too long for the summary budget would be
+    map-reduced at one call per chunk, so that waits for the student to ask.
+    """
+    version = notes_version(notes_text)
+    background = background_session(session_id)
+    chunks = ChunkTable(notes_text)
+    styles = [style for style in STYLE_MAP.values() if single_prompt(notes_text, style) is not None]
+    steps = len(styles) + len(PRECOMPUTE_QUIZ_DIFFICULTIES) + 1
+    job.report(0.0, "Indexing notes…")
+    index = share_index(version, lambda: BM25Index.from_text(notes_text, version=version))
+
+    done = 1
+    for style in styles:
+        job.report(done / steps, "Preparing summaries…")
+        prompt, cache_key = summary_prompt(job, notes_text, style, background)
+        stream_text(prompt, background, on_text=lambda _: job.check(), feature="summary", cache_key=cache_key)
+        done += 1
+
+    bank = get_question_bank()
+    for difficulty in PRECOMPUTE_QUIZ_DIFFICULTIES:
+        job.report(done / steps, f"Preparing {difficulty.lower()} quiz questions…")
+        job.check()
+        if bank.count(version, difficulty) < PRECOMPUTE_QUIZ_QUESTIONS:
+            questions = generate_quiz(chunks, PRECOMPUTE_QUIZ_QUESTIONS, difficulty, background,
+                                      on_shard=lambda *_: job.check(),
+                                      avoid=bank.questions_by_chunk(version, difficulty))
+            bank.add(version, difficulty, questions)
+        done += 1
+    job.report(1.0, "")
+    return index  # referenced while the job is kept; cached by the registry after that
+
+
+_executor = JobExecutor(workers=PRECOMPUTE_WORKERS)
+
+
+def precompute_enabled():
+    return os.getenv("PRECOMPUTE_ON_INGEST", "1" if PRECOMPUTE_ON_INGEST else "0") != "0"
+
+
+def schedule_precompute(notes_text):
+    """Ingest hook: precompute for newly saved notes, cancelling work for the previous ones."""
+    cancel_precompute()
+    if not notes_text or not precompute_enabled():
+        return None
+    session_id = current_session_id()
+    job = _executor.submit("precompute", "notes", session_id, precompute_notes, notes_text, session_id)
+    st.session_state.notes_precompute_job = job
+    return job
+
+
+def cancel_precompute():
+    job = st.session_state.get("notes_precompute_job")
+    if job is not None:
+        job.cancel()
+    st.session_state.notes_precompute_job = None
+
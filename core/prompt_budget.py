@@ -0,0 +1,87 @@
+# core/prompt_budget.py
+import logging
+import re
+import threading
+
+from config.settings import MODEL_NAME, PROMPT_TOKEN_BUDGETS, DEFAULT_PROMPT_TOKEN_BUDGET
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Local token estimate (no API call).
+
+    Gemini's tokenizer averages about 4 characters per token on English
+    prose; short words and punctuation push that up, so take whichever of
+    the character and word/punctuation estimates is larger.
+    """
+    if not text:
+        return 0
+    return int(max(len(text) / 4, len(WORD_RE.findall(text)) * 0.75)) + 1
+
+
+def prompt_budget(feature, model_name=MODEL_NAME):
+    """Max prompt tokens for a feature on a model (falls back to the model default)."""
+    budgets = PROMPT_TOKEN_BUDGETS.get(model_name, {})
+    return budgets.get(feature, budgets.get("default", DEFAULT_PROMPT_TOKEN_BUDGET))
+
+
+def fit_chunks(chunks, budget_tokens, reserved_tokens=0):
+    """Keep ranked chunks (best first) that fit the budget; the lowest-ranked go first.
+
+    If not even the best chunk fits, it is cut down to the space left so
+    the question still gets some context.
+    """
+    left = budget_tokens - reserved_tokens
+    kept = []
+    for chunk in chunks:
+        cost = estimate_tokens(chunk)
+        if cost <= left:
+            kept.append(chunk)
+            left -= cost
+        elif not kept and left > 0:
+            kept.append(chunk[: left * 4])
+            break
+        else:
+            break
+    return kept
+
+
+class UsageLog:
+    """Prompt/response token totals per feature for this server process."""
+
+    def __init__(self):
+        self.features = {}
+        self._lock = threading.Lock()
+
+    def record(self, feature, prompt, reply, usage=None):
+        """Count one call; usage is Gemini's usage_metadata when the API returned it."""
+        prompt_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+        reply_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(reply)
+        with self._lock:
+            row = self.features.setdefault(
+                feature, {"calls": 0, "prompt_tokens": 0, "response_tokens": 0, "max_prompt_tokens": 0}
+            )
+            row["calls"] += 1
+            row["prompt_tokens"] += prompt_tokens
+            row["response_tokens"] += reply_tokens
+            row["max_prompt_tokens"] = max(row["max_prompt_tokens"], prompt_tokens)
+        budget = prompt_budget(feature)
+        if prompt_tokens > budget:
+            logger.warning("%s prompt used %d tokens (budget %d)", feature, prompt_tokens, budget)
+        else:
+            logger.info("%s: prompt %d tokens, response %d tokens", feature, prompt_tokens, reply_tokens)
+        return prompt_tokens, reply_tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {feature: dict(row) for feature, row in self.features.items()}
+
+
+_usage = UsageLog()
+
+
+def get_usage_log():
+    return _usage
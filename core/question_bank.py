@@ -0,0 +1,164 @@
+# core/question_bank.py
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from config.settings import QUIZ_BANK_PATH, QUIZ_BANK_AVOID
+
+
+class QuestionBank:
+    """Every generated MCQ, by notes version, source chunk and difficulty, in SQLite.
+
+    Quizzes are drawn from the bank; each question drawn is recorded
+    against the student so they never get it twice. New questions are
+    only needed once a student has seen most of the bank for their notes.
+    """
+
+    def __init__(self, path=QUIZ_BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                " id INTEGER PRIMARY KEY, notes_hash TEXT NOT NULL, chunk INTEGER NOT NULL,"
+                " difficulty TEXT NOT NULL, question TEXT NOT NULL, options TEXT NOT NULL,"
+                " answer TEXT NOT NULL, created REAL NOT NULL,"
+                " UNIQUE (notes_hash, difficulty, question));"
+                "CREATE INDEX IF NOT EXISTS questions_by_notes ON questions (notes_hash, difficulty, chunk);"
+                "CREATE TABLE IF NOT EXISTS served ("
+                " student TEXT NOT NULL, question_id INTEGER NOT NULL, served REAL NOT NULL,"
+                " PRIMARY KEY (student, question_id));"
+            )
+        return self._db
+
+    def add(self, notes_hash, difficulty, questions):
+        """Bank questions (dicts from the MCQ parser, "chunk" defaulting to 0); returns their ids.
+
+        A question already in the bank for these notes and difficulty keeps
+        its original id.
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            try:
+                db = self._conn()
+                for q in questions:
+                    db.execute(
+                        "INSERT OR IGNORE INTO questions"
+                        " (notes_hash, chunk, difficulty, question, options, answer, created)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (notes_hash, q.get("chunk", 0), difficulty, q["question"],
+                         json.dumps(q["options"]), q["answer"], now),
+                    )
+                    ids.append(db.execute(
+                        "SELECT id FROM questions WHERE notes_hash = ? AND difficulty = ? AND question = ?",
+                        (notes_hash, difficulty, q["question"]),
+                    ).fetchone()[0])
+                db.commit()
+            except sqlite3.Error:
+                return []  # quizzes still work, they just are not banked
+        return ids
+
+    def mark_served(self, student, question_ids):
+        with self._lock:
+            try:
+                self._record(self._conn(), student, question_ids)
+            except sqlite3.Error:
+                pass
+
+    def _record(self, db, student, question_ids):
+        now = time.time()
+        db.executemany(
+            "INSERT OR IGNORE INTO served (student, question_id, served) VALUES (?, ?, ?)",
+            [(student, question_id, now) for question_id in question_ids],
+        )
+        db.commit()
+
+    def _unseen(self, db, notes_hash, difficulty, student):
+        return db.execute(
+            "SELECT id, chunk, question, options, answer FROM questions q"
+            " WHERE notes_hash = ? AND difficulty = ? AND NOT EXISTS"
+            " (SELECT 1 FROM served s WHERE s.student = ? AND s.question_id = q.id)",
+            (notes_hash, difficulty, student),
+        ).fetchall()
+
+    def count(self, notes_hash, difficulty):
+        with self._lock:
+            try:
+                return self._conn().execute(
+                    "SELECT COUNT(*) FROM questions WHERE notes_hash = ? AND difficulty = ?",
+                    (notes_hash, difficulty),
+                ).fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def draw(self, notes_hash, difficulty, student, count, allow_fewer=False):
+        """`count` questions this student has not seen, spread over the notes, in document order.
+
+        Questions are picked at random, one chunk at a time in turn, and
+        recorded as served. Returns None when fewer than `count` are left
+        (unless allow_fewer).
+        """
+        with self._lock:
+            try:
+                db = self._conn()
+                rows = self._unseen(db, notes_hash, difficulty, student)
+            except sqlite3.Error:
+                return None
+            if not rows or (len(rows) < count and not allow_fewer):
+                return None
+            by_chunk = defaultdict(list)
+            for row in rows:
+                by_chunk[row[1]].append(row)
+            chunks = sorted(by_chunk)
+            random.shuffle(chunks)  # which sections give the spare questions varies per quiz
+            queues = [by_chunk[chunk] for chunk in chunks]
+            for queue in queues:
+                random.shuffle(queue)
+            picked = []
+            while len(picked) < count and any(queues):
+                for queue in queues:
+                    if queue and len(picked) < count:
+                        picked.append(queue.pop())
+            picked.sort(key=lambda row: (row[1], row[0]))
+            try:
+                self._record(db, student, [row[0] for row in picked])
+            except sqlite3.Error:
+                pass
+        return [
+            {"question": question, "options": json.loads(options), "answer": answer, "chunk": chunk}
+            for _, chunk, question, options, answer in picked
+        ]
+
+    def questions_by_chunk(self, notes_hash, difficulty, limit=QUIZ_BANK_AVOID):
+        """{chunk: [question text]} (newest `limit` per chunk), for prompts asking for new questions."""
+        with self._lock:
+            try:
+                rows = self._conn().execute(
+                    "SELECT chunk, question FROM questions WHERE notes_hash = ? AND difficulty = ?"
+                    " ORDER BY id DESC",
+                    (notes_hash, difficulty),
+                ).fetchall()
+            except sqlite3.Error:
+                rows = []
+        banked = defaultdict(list)
+        for chunk, question in rows:
+            if len(banked[chunk]) < limit:
+                banked[chunk].append(question)
+        return dict(banked)
+
+
+_bank = QuestionBank()
+
+
+def get_question_bank():
+    return _bank
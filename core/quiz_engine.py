@@ -0,0 +1,203 @@
+# core/quiz_engine.py
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.settings import QUIZ_SHARD_WORKERS, QUIZ_DUPLICATE_SIMILARITY, QUIZ_EXTRA_FRACTION, QUIZ_BANK_BATCH
+from core.gemini_utils import generate_text, stream_text, record_call
+from core.jobs import JobCancelled, get_job_executor
+from core.question_bank import get_question_bank
+from core.response_cache import get_response_cache
+from core.text_utils import parse_mcq_text, MCQStreamParser
+
+SHARD_PROMPT = """
+From the notes below, generate {count} multiple-choice questions of {difficulty} difficulty.
+Provide 4 options (A, B, C, D) and mark the correct one.
+
+Q1. <question text>
+A) <option>
+B) <option>
+C) <option>
+D) <option>
+Answer: <A/B/C/D>
+{avoid}
+Notes:
+{chunk}
+"""
+
+AVOID_PROMPT = """
+These questions were already asked; write different ones:
+{questions}
+"""
+
+
+def avoid_text(questions):
+    """Prompt section listing banked questions not to repeat ("" when there are none)."""
+    if not questions:
+        return ""
+    return AVOID_PROMPT.format(questions="\n".join(f"- {q}" for q in questions))
+
+
+def allocate_questions(num_questions, num_chunks):
+    """Spread num_questions over the document: [(chunk_index, count), ...] in document order.
+
+    With more chunks than questions, evenly spaced chunks get one question
+    each so the quiz covers the start, middle and end of the notes.
+    """
+    if num_chunks <= 0 or num_questions <= 0:
+        return []
+    if num_questions < num_chunks:
+        step = num_chunks / num_questions
+        return [(int(i * step + step / 2), 1) for i in range(num_questions)]
+    base, extra = divmod(num_questions, num_chunks)
+    return [(i, base + (1 if i < extra else 0)) for i in range(num_chunks)]
+
+
+def is_complete(q):
+    return bool(q.get("question")) and len(q.get("options", [])) == 4 and q.get("answer") is not None
+
+
+def _signature(question):
+    return frozenset(re.findall(r"\w+", question.lower()))
+
+
+def is_near_duplicate(sig, seen, threshold=QUIZ_DUPLICATE_SIMILARITY):
+    """Jaccard similarity of question word sets against every kept question."""
+    for other in seen:
+        union = len(sig | other)
+        if union and len(sig & other) / union >= threshold:
+            return True
+    return False
+
+
+def merge_shards(shards, num_questions):
+    """Round-robin across shards (document order), dropping near-duplicates."""
+    merged, seen = [], []
+    queues = [list(shard) for shard in shards]
+    while len(merged) < num_questions and any(queues):
+        for queue in queues:
+            if not queue or len(merged) >= num_questions:
+                continue
+            q = queue.pop(0)
+            sig = _signature(q["question"])
+            if is_near_duplicate(sig, seen):
+                continue
+            seen.append(sig)
+            merged.append(q)
+    return merged
+
+
+def generate_quiz(chunks, num_questions, difficulty, session_id, workers=QUIZ_SHARD_WORKERS, on_shard=None,
+                  avoid=None):
+    """Generate a quiz from all chunks concurrently; latency is that of the slowest shard.
+
+    Each shard is asked for a few extra questions so that dropping
+    duplicates and malformed blocks still leaves num_questions. Questions
+    carry the index of their source chunk. avoid is {chunk: [question text]}
+    of questions the shards must not repeat. on_shard(done, total) is
+    called from the calling thread.
+    """
+    avoid = avoid or {}
+    wanted = num_questions + math.ceil(num_questions * QUIZ_EXTRA_FRACTION)
+    plan = allocate_questions(wanted, len(chunks))
+    shards = [[] for _ in plan]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-shard") as pool:
+        futures = {
+            pool.submit(generate_text,
+                        SHARD_PROMPT.format(count=count, difficulty=difficulty, chunk=chunks[i],
+                                            avoid=avoid_text(avoid.get(i))),
+                        session_id, feature="quiz_shard"): n
+            for n, (i, count) in enumerate(plan)
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                n = futures[future]
+                shards[n] = [dict(q, chunk=plan[n][0]) for q in parse_mcq_text(future.result()) if is_complete(q)]
+                if on_shard:
+                    on_shard(done, len(plan))
+        finally:
+            for future in futures:
+                future.cancel()  # on_shard raised (e.g. the job was cancelled) or a shard failed
+    return merge_shards(shards, num_questions)
+
+
+def quiz_job(job, chunks, num_questions, difficulty, session_id, notes_hash, student):
+    """Background job (see core.jobs) for a sharded quiz; returns the questions.
+
+    Runs when the student has too few unseen questions in the bank: at
+    least QUIZ_BANK_BATCH new ones are generated (asking the shards not to
+    repeat banked ones) and banked, then the quiz is drawn from the bank.
+    """
+    def on_shard(done, total):
+        job.check()
+        job.report(done / total, f"Generated {done}/{total} sections…")
+
+    bank = get_question_bank()
+    job.report(0.0, "Generating questions across your notes…")
+    questions = generate_quiz(chunks, max(num_questions, QUIZ_BANK_BATCH), difficulty, session_id,
+                              on_shard=on_shard, avoid=bank.questions_by_chunk(notes_hash, difficulty))
+    if not bank.add(notes_hash, difficulty, questions):
+        return questions[:num_questions]
+    return bank.draw(notes_hash, difficulty, student, num_questions, allow_fewer=True) or []
+
+
+class QuizStream:
+    """Streams one quiz request as a background job, parsing as text arrives.
+
+    Each question is appended to `questions` (the list the quiz UI reads)
+    as soon as its Answer: line is parsed, so the first question can be
+    answered while the rest are still generating. The raw text is stored
+    in the response cache once complete, and on_complete(questions) is
+    called after a successful run.
+    """
+
+    def __init__(self, prompt, session_id, questions, cache_key=None, on_complete=None):
+        self.prompt = prompt
+        self.session_id = session_id
+        self.questions = questions
+        self.cache_key = cache_key
+        self.on_complete = on_complete
+        self.parser = MCQStreamParser()
+        self.error = None
+        self.job = None
+
+    @property
+    def running(self):
+        return self.job is not None and self.job.running
+
+    @property
+    def malformed(self):
+        return self.parser.errors
+
+    def start(self):
+        self.job = get_job_executor().submit("quiz", "Quiz", self.session_id, self._run)
+        return self
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def _consume(self, text):
+        self.job.check()
+        self.questions.extend(self.parser.feed(text))
+
+    def _run(self, job):
+        self.job = job  # may start before start() has stored it
+        cache = get_response_cache() if self.cache_key else None
+        try:
+            cached = cache.get(self.cache_key) if cache else None
+            if cached is not None:
+                self._consume(cached)
+                record_call("quiz", self.prompt, cached, cache_hit=True)
+            else:
+                text = stream_text(self.prompt, self.session_id, on_text=self._consume, feature="quiz")
+                if cache and self.parser.count:
+                    cache.put(self.cache_key, text.strip())
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.questions.extend(self.parser.close())
+        if self.on_complete is not None and self.error is None:
+            self.on_complete(self.questions)
@@ -0,0 +1,169 @@
+# core/rate_limiter.py
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+from config.settings import (
+    RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_BACKOFF_BASE, RATE_LIMIT_BACKOFF_MAX,
+)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if they already are)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Process-wide requests/tokens-per-minute limiter shared by every session.
+
+    Waiting callers are served round-robin by session, so one session that
+    queues many calls cannot starve the others. Background sessions (see
+    background_session) are only served while no other session waits.
+    A 429 from the API pauses everybody through penalize().
+    """
+
+    def __init__(self, rpm=RATE_LIMIT_RPM, tpm=RATE_LIMIT_TPM, history=200):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.recent_waits = deque(maxlen=history)
+        self._queues = OrderedDict()  # session_id -> deque of waiting tickets
+        self._cond = threading.Condition()
+
+    def _try_take(self, session_id, ticket, tokens, now):
+        """Take capacity if `ticket` is next in line; else return seconds to wait."""
+        head_session = self._next_session()
+        if head_session != session_id or self._queues[session_id][0] is not ticket:
+            return None
+        delay = max(self.paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now))
+        if delay > 0:
+            return delay
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self._dequeue(session_id, ticket)
+        return 0.0
+
+    def _next_session(self):
+        """The waiting session whose turn it is (lock held)."""
+        for session_id in self._queues:
+            if not is_background(session_id):
+                return session_id
+        return next(iter(self._queues))
+
+    def _dequeue(self, session_id, ticket):
+        queue = self._queues.get(session_id)
+        if queue is None:
+            return
+        queue.remove(ticket)
+        if queue:
+            self._queues.move_to_end(session_id)  # next turn goes to another session
+        else:
+            del self._queues[session_id]
+        self._cond.notify_all()
+
+    def acquire(self, session_id, tokens=0, on_wait=None, poll=0.5):
+        """Block until this session may send a request of `tokens` tokens.
+
+        on_wait(sessions_ahead, waited_seconds) is called roughly every
+        `poll` seconds while waiting, outside the lock. Returns the wait.
+        """
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    delay = self._try_take(session_id, ticket, tokens, now)
+                    if delay == 0.0:
+                        break
+                    ahead = list(self._queues).index(session_id)
+                    self._cond.wait(poll if delay is None else min(delay, poll))
+                if on_wait:
+                    on_wait(ahead, time.monotonic() - started)
+        except BaseException:
+            with self._cond:
+                self._dequeue(session_id, ticket)
+            raise
+        waited = time.monotonic() - started
+        self.recent_waits.append(waited)
+        return waited
+
+    def penalize(self, seconds):
+        """Pause all sessions for `seconds` (after the API answered 429)."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            depth = sum(len(q) for q in self._queues.values())
+            sessions = len(self._queues)
+            paused = max(0.0, self.paused_until - time.monotonic())
+        waits = sorted(self.recent_waits)
+        return {
+            "queue_depth": depth,
+            "waiting_sessions": sessions,
+            "paused_for": round(paused, 1),
+            "p50_wait": round(waits[len(waits) // 2], 2) if waits else 0.0,
+            "max_wait": round(waits[-1], 2) if waits else 0.0,
+        }
+
+
+BACKGROUND_SUFFIX = ":background"
+
+
+def background_session(session_id):
+    """Limiter key for a session's low-priority work (e.g. precomputation)."""
+    return session_id + BACKGROUND_SUFFIX
+
+
+def is_background(session_id):
+    return session_id.endswith(BACKGROUND_SUFFIX)
+
+
+def is_rate_limit_error(exc):
+    """True for HTTP 429 / google.api_core ResourceExhausted errors."""
+    return type(exc).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(exc)
+
+
+def backoff_delay(attempt, base=RATE_LIMIT_BACKOFF_BASE, cap=RATE_LIMIT_BACKOFF_MAX):
+    """Exponential backoff with jitter: half fixed, half random."""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    return _limiter
+
+
+def set_rate_limiter(limiter):
+    """Swap the process-wide limiter (e.g. a looser quota for a load test); returns it."""
+    global _limiter
+    _limiter = limiter
+    return limiter
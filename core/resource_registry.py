@@ -0,0 +1,122 @@
+# core/resource_registry.py
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+from config.settings import RESOURCE_REGISTRY_MAX_BYTES
+
+
+class ResourceHandle:
+    """A session's reference to a shared resource; dropping the handle releases it."""
+
+    __slots__ = ("key", "value", "_finalizer", "__weakref__")
+
+    def __init__(self, registry, key, value):
+        self.key = key
+        self.value = value
+        self._finalizer = weakref.finalize(self, registry.release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class _Entry:
+    __slots__ = ("value", "size", "refs")
+
+    def __init__(self, value, size):
+        self.value = value
+        self.size = size
+        self.refs = 0
+
+
+class ResourceRegistry:
+    """Process-wide store of models, document texts and indexes shared by all sessions.
+
+    Resources are content-addressed: the first session to ask for a key
+    builds the value (concurrent askers wait for that one build), later
+    sessions get the same object. Each live ResourceHandle counts as one
+    reference. Unreferenced entries stay cached until the total size goes
+    over `max_bytes`, then the least recently used of them are dropped.
+    """
+
+    def __init__(self, max_bytes=RESOURCE_REGISTRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> _Entry, least recently used first
+        self.total_bytes = 0
+        self.builds = 0
+        self.hits = 0
+        self.evictions = 0
+        self._building = {}  # key -> lock held while the value is built
+        self._lock = threading.Lock()
+
+    def acquire(self, key, build, size_of=sys.getsizeof):
+        """Handle to the resource at `key`, calling build() only if it is not held yet."""
+        with self._lock:
+            entry = self._use(key)
+            if entry is None:
+                build_lock = self._building.setdefault(key, threading.Lock())
+        if entry is None:
+            with build_lock:  # one build per key; other sessions wait for it
+                with self._lock:
+                    entry = self._use(key)
+                if entry is None:
+                    value = build()
+                    with self._lock:
+                        entry = self._use(key) or self._add(key, value, size_of(value))
+                        self._building.pop(key, None)
+        return ResourceHandle(self, key, entry.value)
+
+    def _use(self, key):
+        """Take a reference to an existing entry (lock held); None if absent."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.refs += 1
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def _add(self, key, value, size):
+        entry = self.entries[key] = _Entry(value, size)
+        entry.refs = 1
+        self.total_bytes += size
+        self.builds += 1
+        self._evict()
+        return entry
+
+    def release(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+                self._evict()
+
+    def _evict(self):
+        """Drop unreferenced entries, oldest first, until under max_bytes (lock held)."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key in [k for k, e in self.entries.items() if e.refs == 0]:
+            entry = self.entries.pop(key)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+            if self.total_bytes <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "in_use": sum(1 for e in self.entries.values() if e.refs),
+                "handles": sum(e.refs for e in self.entries.values()),
+                "mb": round(self.total_bytes / 2**20, 1),
+                "builds": self.builds,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+
+_registry = ResourceRegistry()
+
+
+def get_resource_registry():
+    return _registry
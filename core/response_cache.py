@@ -0,0 +1,103 @@
+# core/response_cache.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import RESPONSE_CACHE_PATH, RESPONSE_CACHE_MEMORY_ENTRIES
+
+
+def normalize_prompt(prompt):
+    """Whitespace-insensitive form of a prompt, so re-indented f-strings still hit."""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def response_key(model_name, prompt, notes_hash=""):
+    """Cache key from the model, the normalized prompt hash and the notes hash."""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{model_name}:{notes_hash}:{prompt_hash}"
+
+
+class ResponseCache:
+    """Finished LLM answers: in-memory LRU in front of a SQLite table."""
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_entries=RESPONSE_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+        return self._db
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            try:
+                db = self._conn()
+                row = db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row:
+                    db.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+                    db.commit()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key, response):
+        if not response:
+            return
+        with self._lock:
+            self._remember(key, response)
+            try:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, time.time()),
+                )
+                db.commit()
+            except sqlite3.Error:
+                pass  # the memory tier still serves this process
+
+    def _remember(self, key, response):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "memory_entries": len(self._entries),
+        }
+
+
+_cache = ResponseCache()
+
+
+def get_response_cache():
+    return _cache
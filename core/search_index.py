@@ -0,0 +1,160 @@
+# core/search_index.py
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter
+
+import streamlit as st
+
+from core.resource_registry import get_resource_registry
+from core.text_utils import ChunkTable
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-case word tokens, same rule keyword_score uses."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def notes_version(text):
+    """Content hash identifying one version of the notes."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class BM25Index:
+    """Inverted index over note chunks, ranked with Okapi BM25."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.version = None
+        self.chunks = []  # chunk strings while streaming; a ChunkTable over the notes once complete
+        self.doc_lens = []
+        self.postings = {}  # term -> [(chunk_id, term_freq), ...]
+        self.total_len = 0
+
+    @classmethod
+    def from_text(cls, text, version=None, **kwargs):
+        """Index whose chunks are offsets into `text` rather than copies of it."""
+        index = cls(**kwargs)
+        table = ChunkTable(text)
+        for chunk_id, chunk in enumerate(table):
+            index._add_postings(chunk_id, chunk)
+        index.chunks = table
+        index.version = version or notes_version(text)
+        return index
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def memory_bytes(self):
+        """Rough footprint: chunk storage plus ~72 bytes per posting and ~120 per term."""
+        postings = sum(len(p) for p in self.postings.values())
+        if isinstance(self.chunks, ChunkTable):
+            chunk_bytes = self.chunks.memory_bytes()
+        else:
+            chunk_bytes = sum(len(c) for c in self.chunks)
+        return chunk_bytes + 72 * postings + 120 * len(self.postings)
+
+    def attach_text(self, text):
+        """Swap streamed chunk strings for offsets into the finished notes text."""
+        table = ChunkTable(text)
+        if len(table) == len(self.chunks) and (not table or table[-1] == self.chunks[-1]):
+            self.chunks = table
+
+    def add_chunk(self, chunk):
+        """Append one chunk (a string) and index it; used while streaming."""
+        # The chunk goes in before its postings so a search running on
+        # another thread never sees a chunk_id it cannot resolve.
+        chunk_id = len(self.chunks)
+        self.chunks.append(chunk)
+        return self._add_postings(chunk_id, chunk)
+
+    def _add_postings(self, chunk_id, chunk):
+        """Tokenize one chunk and append it to the postings lists."""
+        counts = Counter(tokenize(chunk))
+        length = sum(counts.values())
+        self.doc_lens.append(length)
+        self.total_len += length
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append((chunk_id, tf))
+        return chunk_id
+
+    def doc_freq(self, term):
+        return len(self.postings.get(term, ()))
+
+    def idf(self, term, n=None, df=None):
+        n = len(self.chunks) if n is None else n
+        df = self.doc_freq(term) if df is None else df
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, question, top_k=3, corpus=None):
+        """Return the top_k (chunk_id, score) pairs for a question.
+
+        corpus is (chunk count, average chunk length, {term: doc freq}) of
+        a larger collection this index is part of; scores then use those
+        statistics, so they compare across indexes (see
+        notes_library.search_documents).
+        """
+        if not self.chunks:
+            return []
+        if corpus is None:
+            avg_len = self.total_len / len(self.chunks) or 1.0
+        else:
+            n, avg_len, dfs = corpus
+        k1, b = self.k1, self.b
+        scores = {}
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term) if corpus is None else self.idf(term, n, dfs[term])
+            for chunk_id, tf in postings:
+                norm = k1 * (1 - b + b * self.doc_lens[chunk_id] / avg_len)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        # Ties go to the earlier chunk, like the old stable sort did.
+        return heapq.nsmallest(top_k, ((cid, s) for cid, s in scores.items()),
+                               key=lambda item: (-item[1], item[0]))
+
+    def top_chunks(self, question, top_k=3):
+        """Chunk texts to send as context, best match first.
+
+        When fewer than top_k chunks share a word with the question the
+        remaining slots are filled from the start of the notes, matching
+        what pick_relevant_chunks has always returned.
+        """
+        hits = [cid for cid, _ in self.search(question, top_k)]
+        seen = set(hits)
+        for cid in range(len(self.chunks)):
+            if len(hits) >= top_k:
+                break
+            if cid not in seen:
+                hits.append(cid)
+        return [self.chunks[cid] for cid in hits]
+
+
+def share_index(version, build):
+    """Handle to the process-wide index for a notes version, built at most once."""
+    return get_resource_registry().acquire(f"index:{version}", build, size_of=BM25Index.memory_bytes)
+
+
+def set_notes_index(handle, notes_text):
+    st.session_state["notes_index_handle"] = handle
+    st.session_state["notes_index"] = handle.value
+    st.session_state["notes_index_source"] = notes_text
+
+
+def get_notes_index(notes_text):
+    """Return the index for the current notes; sessions with the same notes share one."""
+    index = st.session_state.get("notes_index")
+    if index is not None and st.session_state.get("notes_index_source") is notes_text:
+        return index
+    version = notes_version(notes_text)
+    if index is None or index.version != version:
+        set_notes_index(share_index(version, lambda: BM25Index.from_text(notes_text, version=version)),
+                        notes_text)
+    else:
+        st.session_state["notes_index_source"] = notes_text
+    return st.session_state["notes_index"]
@@ -1,15 +1,86 @@
 # core/session_utils.py
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import uuid
+from functools import lru_cache
 import streamlit as st
-import google.generativeai as genai
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from core.file_utils import NOTES_DIR
+from core.resource_registry import get_resource_registry
+from core.search_index import notes_version
+from core.transcripts import open_transcript
+
+def current_session_id():
+    """Id of the browser session running this script (shared limiter key)."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+STUDENT_SECRET_PATH = os.path.join(NOTES_DIR, ".student_secret")
+
+@lru_cache(maxsize=None)
+def _student_secret():
+    """Key signing student ids: STUDENT_ID_SECRET, else a random one kept on disk across restarts."""
+    secret = os.getenv("STUDENT_ID_SECRET")
+    if secret:
+        return secret.encode("utf-8")
+    try:
+        with open(STUDENT_SECRET_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    secret = secrets.token_bytes(32)
+    os.makedirs(NOTES_DIR, exist_ok=True)
+    with open(STUDENT_SECRET_PATH, "wb") as f:
+        f.write(secret)
+    return secret
+
+def _sign(raw_id):
+    return hmac.new(_student_secret(), raw_id.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+def _verified_student(token):
+    """The id inside a signed `<id>.<signature>` token, or None if it was not issued here."""
+    raw_id, _, signature = (token or "").partition(".")
+    if raw_id and signature and hmac.compare_digest(signature, _sign(raw_id)):
+        return raw_id
+    return None
+
+def student_id():
+    """Pseudonymous id of the student using this browser, for per-student history.
+
+    It rides in the page URL as a signed token (?student=<id>.<sig>) so
+    reloads keep it; tokens this server did not issue are replaced by a
+    fresh id, so nobody can pick someone else's id. It is not a login:
+    whoever is given the link shares that history.
+    """
+    if "student_id" not in st.session_state:
+        raw_id = _verified_student(st.query_params.get("student")) or uuid.uuid4().hex
+        st.session_state.student_id = raw_id
+        st.query_params["student"] = f"{raw_id}.{_sign(raw_id)}"
+    return st.session_state.student_id
+
+def set_notes_text(text: str):
+    """Point this session at the shared copy of the notes text.
+
+    Sessions holding the same notes (e.g. a class uploading one syllabus)
+    share one string; the handle in notes_doc keeps it registered.
+    """
+    if not text:
+        st.session_state.notes_doc = None
+        st.session_state.notes_text = ""
+        return ""
+    handle = get_resource_registry().acquire(f"doc:{notes_version(text)}", lambda: text, size_of=sys.getsizeof)
+    st.session_state.notes_doc = handle
+    st.session_state.notes_text = handle.value
+    return handle.value
 
 def init_session_state(model_name: str):
     """Initialize all Streamlit session_state variables safely."""
 
     defaults = {
-        "base_messages": [],
-        "notes_messages": [],
         "notes_text": "",
-        "last_call_time": 0.0,
         "generated_mcqs": [],
         "current_mcq_index": 0,
         "mcq_score": 0,
@@ -20,9 +91,11 @@ def init_session_state(model_name: str):
         if key not in st.session_state:
             st.session_state[key] = value
 
-    # Ensure chat sessions exist
-    if "base_chat" not in st.session_state:
-        st.session_state.base_chat = genai.GenerativeModel(model_name).start_chat(history=[])
+    # Chat transcripts live in append-only files; session state holds their newest messages
+    for chat in ("base", "notes"):
+        if f"{chat}_messages" not in st.session_state:
+            st.session_state[f"{chat}_messages"] = open_transcript(current_session_id(), chat)
 
-    if "notes_chat" not in st.session_state:
-        st.session_state.notes_chat = genai.GenerativeModel(model_name).start_chat(history=[])
\ No newline at end of file
+    # Ensure chat sessions exist (imported here: gemini_utils imports this module)
+    from core.gemini_utils import ensure_chat_sessions
+    ensure_chat_sessions(model_name)
\ No newline at end of file
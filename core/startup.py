@@ -0,0 +1,60 @@
+# core/startup.py
+import logging
+import threading
+import time
+from collections import deque
+
+from config.settings import METRICS_WINDOW
+from core.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Seconds spent in each named stage of one script run, measured back to back."""
+
+    def __init__(self, started=None):
+        self.last = started or time.perf_counter()
+        self.stages = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+
+class StartupReport:
+    """The process's first (cold) script run, plus the setup cost of recent reruns."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.cold = None  # stage -> seconds
+        self.reruns = deque(maxlen=window)  # stage -> seconds, per rerun
+        self._lock = threading.Lock()
+
+    def record(self, stages):
+        with self._lock:
+            cold = self.cold is None
+            if cold:
+                self.cold = dict(stages)
+            else:
+                self.reruns.append(dict(stages))
+        if cold:
+            logger.info("cold start: %s", ", ".join(f"{k} {v:.3f}s" for k, v in stages.items()))
+
+    def summary(self):
+        """{"cold": {stage: s}, "reruns": n, "rerun": {stage: (p50, p90)}} for the sidebar."""
+        with self._lock:
+            cold, reruns = self.cold, list(self.reruns)
+        rerun = {}
+        for stage in (cold or {}):
+            values = sorted(r[stage] for r in reruns if stage in r)
+            if values:
+                rerun[stage] = (percentile(values, 0.5), percentile(values, 0.9))
+        return {"cold": cold, "reruns": len(reruns), "rerun": rerun}
+
+
+_report = StartupReport()
+
+
+def get_startup_report():
+    return _report
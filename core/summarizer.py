@@ -0,0 +1,139 @@
+# core/summarizer.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.settings import MODEL_NAME, SUMMARY_MAP_WORKERS, SUMMARY_REDUCE_CHARS
+from core.gemini_utils import generate_text, stream_text
+from core.prompt_budget import estimate_tokens, prompt_budget
+from core.response_cache import response_key
+from core.search_index import notes_version
+from core.text_utils import ChunkTable
+
+# Detail levels offered by the summary tab -> style instruction for the final call
+STYLE_MAP = {
+    "Very short bullets": "Keep it extremely concise (max 5 bullets).",
+    "Short bullets": "Use up to 8 bullets with key points.",
+    "Detailed bullets": "Use up to 12 bullets, with brief explanations."
+}
+
+# Map and intermediate reduce prompts do not mention the detail level, so their
+# cached answers are reused when the student switches levels; only the final
+# call changes.
+MAP_PROMPT = """
+Summarize this section of study notes as concise bullet points.
+Keep every key definition, fact, formula and name; drop filler.
+
+Section:
+{chunk}
+"""
+
+REDUCE_PROMPT = """
+Merge these summaries of consecutive sections of study notes into one list of
+concise bullet points. Remove repetition but keep every key fact.
+
+{summaries}
+"""
+
+SINGLE_PROMPT = """
+Summarize the following study notes into {style}
+Use simple language for quick revision.
+
+Notes:\n\n{notes}
+"""
+
+FINAL_PROMPT = """
+Summarize the following study notes into {style}
+Use simple language for quick revision.
+
+Notes (already condensed section by section):\n\n{summaries}
+"""
+
+
+def map_sections(chunks, session_id, workers=SUMMARY_MAP_WORKERS):
+    """Summarize chunks concurrently; yields (chunk_index, summary) as each finishes."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-map") as pool:
+        futures = {
+            pool.submit(generate_text, MAP_PROMPT.format(chunk=chunk), session_id, feature="summary_map"): i
+            for i, chunk in enumerate(chunks)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()  # the caller stopped early (error or cancelled job)
+
+
+def batch_by_size(texts, limit):
+    """Group consecutive texts into batches of at most `limit` chars (one text may exceed it)."""
+    batches, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(text) > limit:
+            batches.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text) + 2
+    if current:
+        batches.append(current)
+    return batches
+
+
+def reduce_summaries(summaries, session_id, limit=SUMMARY_REDUCE_CHARS, workers=SUMMARY_MAP_WORKERS):
+    """Merge summaries level by level until they fit one final call."""
+    summaries = [s for s in summaries if s]
+    while len(summaries) > 1 and sum(len(s) + 2 for s in summaries) > limit:
+        batches = batch_by_size(summaries, limit)
+        if len(batches) == len(summaries):
+            break  # every summary is already at the limit on its own
+        prompts = [REDUCE_PROMPT.format(summaries="\n\n".join(batch)) for batch in batches]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-reduce") as pool:
+            merged = pool.map(lambda p: generate_text(p, session_id, feature="summary_reduce"), prompts)
+            summaries = [s for s in merged if s]
+    return summaries
+
+
+def final_prompt(summaries, style):
+    return FINAL_PROMPT.format(style=style, summaries="\n\n".join(summaries))
+
+
+def single_prompt(notes_text, style):
+    """The one-request summary prompt, or None when it exceeds the summary token budget."""
+    prompt = SINGLE_PROMPT.format(style=style, notes=notes_text)
+    return prompt if estimate_tokens(prompt) <= prompt_budget("summary") else None
+
+
+def summary_prompt(job, notes_text, style, session_id):
+    """(prompt, cache_key) of the final summary call for the notes.
+
+    Notes whose prompt fits the summary token budget are summarized in one
+    request; only longer notes are mapped section by section (shown in
+    job.sections) and reduced first, since that costs several calls.
+    """
+    prompt = single_prompt(notes_text, style)
+    if prompt is not None:
+        return prompt, response_key(MODEL_NAME, prompt, notes_version(notes_text))
+    chunks = ChunkTable(notes_text)
+    total = len(chunks)
+    job.sections = [""] * total
+    job.report(0.0, f"Summarizing section 0/{total}…")
+    sections = map_sections(chunks, session_id)
+    try:
+        for done, (i, summary) in enumerate(sections, start=1):
+            job.check()
+            job.sections[i] = summary
+            job.report(0.9 * done / total, f"Summarizing section {done}/{total}…")
+    finally:
+        sections.close()
+    job.report(0.9, "Combining section summaries…")
+    merged = reduce_summaries(job.sections, session_id)
+    job.check()
+    prompt = final_prompt(merged, style)
+    return prompt, response_key(MODEL_NAME, prompt)
+
+
+def summarize_notes(job, notes_text, style, session_id):
+    """Background job (see core.jobs): the whole summary, streamed into job.partial."""
+    prompt, cache_key = summary_prompt(job, notes_text, style, session_id)
+    job.report(message="Writing the summary…")
+    reply = stream_text(prompt, session_id, on_text=job.append, feature="summary", cache_key=cache_key)
+    job.report(1.0, "")
+    return reply.strip()
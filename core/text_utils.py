@@ -1,31 +1,144 @@
 # core/text_utils.py
+import heapq
 import re
+from array import array
+from core.prompt_budget import estimate_tokens, fit_chunks
+
+SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s")
+NON_SPACE_RE = re.compile(r"\S")
+
+def _chunk_end(text, start, max_chars):
+    """Where the chunk starting at `start` ends (more than max_chars of text must follow).
+
+    The last paragraph break in the back half of the window wins, then the
+    last sentence end, then the last space; only text[start:start + max_chars + 1]
+    is looked at, so streamed and whole-text chunking agree.
+    """
+    limit = start + max_chars
+    floor = start + max_chars // 2
+    para = text.rfind("\n\n", floor, limit)
+    if para != -1:
+        return para
+    end = None
+    for m in SENTENCE_END_RE.finditer(text, floor, limit + 1):
+        end = m.end() - 1
+    if end is not None:
+        return end
+    space = text.rfind(" ", floor, limit)
+    return space if space != -1 else limit
+
+def _next_start(text, start, end, overlap):
+    """Start of the next chunk: the first sentence that begins in the last `overlap` chars."""
+    lo = max(start + 1, end - overlap)
+    m = SENTENCE_END_RE.search(text, lo, end)
+    if m:
+        pos = m.end()
+    else:
+        space = text.find(" ", lo, end)
+        pos = space + 1 if space != -1 else lo
+    m = NON_SPACE_RE.search(text, pos, end)
+    return m.start() if m else pos
+
+class ChunkTable:
+    """Chunks of one text as (start, end) offsets instead of copied substrings.
+
+    Boundaries are snapped to paragraphs, then sentences, then words; the
+    next chunk starts at a sentence inside the previous chunk's last
+    `overlap` characters. Offsets live in two arrays, so the table costs
+    16 bytes per chunk on top of the text; table[i] slices a chunk out
+    only when it is needed.
+    """
+
+    def __init__(self, text, max_chars=8000, overlap=300):
+        self.text = text
+        self.starts = array("q")
+        self.ends = array("q")
+        m = NON_SPACE_RE.search(text)
+        if not m:
+            return
+        start, stop = m.start(), len(text)
+        while text[stop - 1].isspace():
+            stop -= 1
+        while stop - start > max_chars:
+            end = _chunk_end(text, start, max_chars)
+            self.starts.append(start)
+            self.ends.append(end)
+            start = _next_start(text, start, end, overlap)
+        self.starts.append(start)
+        self.ends.append(stop)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            yield self.text[start:end]
+
+    def span(self, i):
+        return self.starts[i], self.ends[i]
+
+    def memory_bytes(self):
+        """Size of the offset arrays (the text itself is shared, not counted)."""
+        return self.starts.itemsize * (len(self.starts) + len(self.ends))
 
 def split_into_chunks(text, max_chars=8000, overlap=300):
-    text = text.strip()
-    if not text:
-        return []
-    chunks, start = [], 0
-    while start < len(text):
-        end = min(start + max_chars, len(text))
-        chunks.append(text[start:end])
-        if end == len(text): break
-        start = max(0, end - overlap)
-    return chunks
+    """Every chunk as a string; prefer ChunkTable when only a few chunks are needed."""
+    return list(ChunkTable(text, max_chars, overlap))
+
+class ChunkStream:
+    """Incremental ChunkTable: feed text pieces, get finished chunks back.
+
+    Feeding a document piece by piece yields the same chunks as chunking
+    the whole string, while only holding about one chunk of text at a time.
+    """
+
+    def __init__(self, max_chars=8000, overlap=300):
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.buffer = ""
+        self.started = False
+
+    def feed(self, piece):
+        if not self.started:
+            piece = piece.lstrip()
+            if not piece:
+                return []
+            self.started = True
+        self.buffer += piece
+        chunks = []
+        # Like ChunkTable, cut only while more than max_chars of text is left
+        # once trailing whitespace (which may yet be the end of the text) is ignored.
+        while NON_SPACE_RE.search(self.buffer, self.max_chars):
+            end = _chunk_end(self.buffer, 0, self.max_chars)
+            chunks.append(self.buffer[:end])
+            self.buffer = self.buffer[_next_start(self.buffer, 0, end, self.overlap):]
+        return chunks
+
+    def close(self):
+        tail, self.buffer = self.buffer.rstrip(), ""
+        return [tail] if tail else []
 
 def keyword_score(chunk, question):
-    words_q = re.findall(r"\w+", question.lower())
+    words_q = set(re.findall(r"\w+", question.lower()))
     words_c = re.findall(r"\w+", chunk.lower())
-    return sum(1 for w in words_c if w in set(words_q))
+    return sum(1 for w in words_c if w in words_q)
 
 def pick_relevant_chunks(notes_text, question, top_k=3):
-    chunks = split_into_chunks(notes_text)
-    if not chunks:
-        return []
-    ranked = sorted(chunks, key=lambda c: keyword_score(c, question), reverse=True)
-    return ranked[:top_k]
+    """The top_k chunks by keyword_score; only those are sliced out of the notes for good."""
+    table = ChunkTable(notes_text)
+    best = heapq.nlargest(top_k, range(len(table)), key=lambda i: keyword_score(table[i], question))
+    return [table[i] for i in best]
+
+NOTES_PROMPT_OVERHEAD = 80  # tokens used by the fixed instructions below
 
-def build_notes_prompt(context_chunks, question):
+def build_notes_prompt(context_chunks, question, budget_tokens=None):
+    """Q&A prompt; with a token budget the lowest-ranked chunks are dropped first."""
+    if budget_tokens is not None:
+        reserved = NOTES_PROMPT_OVERHEAD + estimate_tokens(question)
+        context_chunks = fit_chunks(context_chunks, budget_tokens, reserved)
     context = "\n\n---\n\n".join(context_chunks)
     return f"""
 You are a helpful study assistant.
@@ -39,23 +152,80 @@ Question: {question}
 Answer:
 """
 
+QUESTION_RE = re.compile(r"^\**\s*Q(?:uestion)?\s*\d+\s*[.):]\**\s*(.*)$", re.IGNORECASE)
+OPTION_RE = re.compile(r"^\**\s*\(?([ABCD])[).:]\**\s*(.*)$")
+ANSWER_RE = re.compile(r"^\**\s*(?:Correct\s+)?Answer\s*\**\s*:\s*\**\s*\(?([ABCD])\b", re.IGNORECASE)
+
+class MCQStreamParser:
+    """Line-based state machine over streamed quiz text.
+
+    feed() takes text chunks as they arrive and returns every question
+    whose Answer: line has been seen. Blocks missing options or a valid
+    answer are skipped and described in `errors` instead of raising.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.current = None
+        self.count = 0
+        self.errors = []
+
+    def feed(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        done = []
+        for line in lines:
+            q = self._line(line.strip())
+            if q:
+                done.append(q)
+        return done
+
+    def close(self):
+        """Flush the last partial line; an unfinished block counts as malformed."""
+        q = self._line(self.buffer.strip())
+        self.buffer = ""
+        if self.current is not None:
+            self._malformed("no Answer line")
+        return [q] if q else []
+
+    def _line(self, line):
+        if not line:
+            return None
+        m = QUESTION_RE.match(line)
+        if m:
+            if self.current is not None:
+                self._malformed("no Answer line")
+            self.current = {"question": m.group(1).strip(), "options": {}}
+            return None
+        if self.current is None:
+            return None  # preamble before the first question
+        m = ANSWER_RE.match(line)
+        if m:
+            return self._finish(m.group(1).upper())
+        m = OPTION_RE.match(line)
+        if m:
+            self.current["options"][m.group(1)] = m.group(2).strip()
+        elif not self.current["options"]:
+            self.current["question"] = f"{self.current['question']} {line}".strip()
+        return None
+
+    def _finish(self, letter):
+        block, self.current = self.current, None
+        options = block["options"]
+        if sorted(options) != ["A", "B", "C", "D"] or not block["question"]:
+            self.current = block
+            self._malformed(f"expected options A-D, got {''.join(sorted(options)) or 'none'}")
+            return None
+        self.count += 1
+        ordered = [options[k] for k in "ABCD"]
+        return {"question": block["question"], "options": ordered, "answer": options[letter]}
+
+    def _malformed(self, reason):
+        block, self.current = self.current, None
+        label = (block["question"] or "(empty question)")[:60]
+        self.errors.append(f"Question after #{self.count} skipped ({reason}): {label}")
+
 def parse_mcq_text(mcq_text):
-    questions = []
-    q_blocks = re.split(r"\nQ\d+\.", mcq_text)
-    for block in q_blocks:
-        block = block.strip()
-        if not block:
-            continue
-        lines = block.split("\n")
-        question_text = lines[0].strip()
-        options, answer = [], None
-        for line in lines[1:]:
-            line = line.strip()
-            if re.match(r"[ABCD]\)", line):
-                options.append(line[3:].strip())
-            elif line.startswith("Answer:"):
-                ans_letter = line.split("Answer:")[1].strip()
-                letter_to_index = {"A":0, "B":1, "C":2, "D":3}
-                answer = options[letter_to_index.get(ans_letter, 0)]
-        questions.append({"question": question_text, "options": options, "answer": answer})
-    return questions
\ No newline at end of file
+    """Parse a complete quiz text; malformed blocks are skipped."""
+    parser = MCQStreamParser()
+    return parser.feed(mcq_text) + parser.close()
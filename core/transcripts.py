@@ -0,0 +1,198 @@
+# core/transcripts.py
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+
+from config.settings import (
+    TRANSCRIPT_SEGMENT_MESSAGES, TRANSCRIPT_MEMORY_MESSAGES, TRANSCRIPT_KEEP_SECONDS, TRANSCRIPT_PRUNE_INTERVAL,
+)
+from core.file_utils import NOTES_DIR
+
+TRANSCRIPT_DIR = os.path.join(NOTES_DIR, ".transcripts")
+
+
+class Transcript:
+    """One chat's messages, as append-only JSONL segment files plus the newest few in memory.
+
+    Appending a message writes one line; a new segment starts every
+    `segment_messages` messages, so earlier history is never rewritten.
+    Only the last `memory_messages` messages are kept in memory, older
+    ones are read back from their segments when asked for.
+    """
+
+    def __init__(self, root, segment_messages=TRANSCRIPT_SEGMENT_MESSAGES,
+                 memory_messages=TRANSCRIPT_MEMORY_MESSAGES):
+        self.root = root
+        self.segment_messages = segment_messages
+        self.count = 0
+        self.generation = 0  # bumped when the messages are replaced (clear / load)
+        self.recent = deque(maxlen=memory_messages)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root, f"{segment:05d}.jsonl")
+
+    def _segments(self):
+        return range((self.count + self.segment_messages - 1) // self.segment_messages)
+
+    def append(self, message):
+        self.extend([message])
+
+    def extend(self, messages):
+        """Append messages ({"role", "content"} dicts), one JSON line each."""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            messages = iter(messages)
+            while True:
+                room = self.segment_messages - self.count % self.segment_messages
+                batch = list(islice(messages, room))
+                if not batch:
+                    return
+                with open(self._segment_path(self.count // self.segment_messages), "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(m, ensure_ascii=False) + "\n" for m in batch)
+                self.recent.extend(batch)
+                self.count += len(batch)
+
+    def messages(self, start=0, stop=None):
+        """Messages[start:stop]; from memory when recent enough, else from the segment files."""
+        with self._lock:
+            stop = self.count if stop is None else min(stop, self.count)
+            start = max(0, start)
+            if start >= stop:
+                return []
+            in_memory = self.memory_start()
+            if start >= in_memory:
+                return list(islice(self.recent, start - in_memory, stop - in_memory))
+            found = []
+            for segment in range(start // self.segment_messages, (stop - 1) // self.segment_messages + 1):
+                first = segment * self.segment_messages
+                with open(self._segment_path(segment), "r", encoding="utf-8") as f:
+                    lines = islice(f, max(0, start - first), stop - first)
+                    found.extend(json.loads(line) for line in lines)
+            return found
+
+    def memory_start(self):
+        """Index of the oldest message still held in memory."""
+        return self.count - len(self.recent)
+
+    def iter_export(self):
+        """The whole transcript as JSONL bytes, one segment file at a time."""
+        for segment in self._segments():
+            with open(self._segment_path(segment), "rb") as f:
+                yield f.read()
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.count = 0
+            self.generation += 1
+            self.recent.clear()
+
+    def load(self, file):
+        """Replace the transcript with the messages of a saved chat file, read in pieces.
+
+        The file is written to a staging transcript first, so a file that
+        turns out not to be a chat (ValueError) leaves this one untouched.
+        """
+        staging = Transcript(f"{self.root}.loading-{uuid.uuid4().hex}", self.segment_messages,
+                             self.recent.maxlen)
+        try:
+            batch = []
+            for message in iter_chat_file(file):
+                batch.append(message)
+                if len(batch) >= self.segment_messages:
+                    staging.extend(batch)
+                    batch = []
+            staging.extend(batch)
+        except BaseException:
+            shutil.rmtree(staging.root, ignore_errors=True)
+            raise
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            if os.path.isdir(staging.root):
+                os.replace(staging.root, self.root)
+            self.count = staging.count
+            self.recent = staging.recent
+            self.generation += 1
+        return self.count
+
+
+def iter_chat_file(file, chunk_chars=64 * 1024):
+    """Messages of a saved chat (binary file): JSONL, or the older JSON array format.
+
+    The file is decoded a chunk at a time, so a long history is never
+    held in memory as a whole. Raises ValueError if it is not a chat.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8")
+    decoder = json.JSONDecoder()
+    buffer, eof = "", False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,[]")  # separators between messages (and the array brackets)
+        try:
+            message, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                if buffer:
+                    raise ValueError("not a saved chat (invalid JSON)")
+                return
+            chunk = text.read(chunk_chars)
+            eof = not chunk
+            buffer += chunk
+            continue
+        if not isinstance(message, dict) or "role" not in message or "content" not in message:
+            raise ValueError("not a saved chat (expected role/content messages)")
+        yield {"role": message["role"], "content": message["content"]}
+        buffer = buffer[end:]
+
+
+_last_prune = None
+_prune_lock = threading.Lock()
+
+
+def prune_transcripts(root=TRANSCRIPT_DIR, keep_seconds=TRANSCRIPT_KEEP_SECONDS):
+    """Delete the transcripts of sessions idle for longer than keep_seconds."""
+    cutoff = time.time() - keep_seconds
+    try:
+        sessions = os.listdir(root)
+    except OSError:
+        return
+    for session in sessions:
+        path = os.path.join(root, session)
+        try:
+            # Appending to a segment does not touch the directory, so look at the files
+            newest = max((os.path.getmtime(os.path.join(d, name))
+                          for d, _, names in os.walk(path) for name in names), default=os.path.getmtime(path))
+        except OSError:
+            continue
+        if newest < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def open_transcript(session_id, chat):
+    """This session's transcript of `chat` ("base" or "notes").
+
+    Idle sessions' transcripts are pruned on the way, at most once every
+    TRANSCRIPT_PRUNE_INTERVAL seconds, so a long-running server keeps
+    cleaning up.
+    """
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        due = _last_prune is None or now - _last_prune >= TRANSCRIPT_PRUNE_INTERVAL
+        if due:
+            _last_prune = now
+    if due:
+        prune_transcripts()
+    return Transcript(os.path.join(TRANSCRIPT_DIR, session_id, chat))
@@ -1,23 +1,19 @@
 # features/chat_general.py
-import json
 import streamlit as st
-import google.generativeai as genai
 from core.gemini_utils import stream_and_accumulate
-from config.settings import MODEL_NAME
+from features.transcript_view import render_transcript, transcript_export, transcript_upload
 
 def general_chat_tab():
     st.subheader("💬 Chat with Gemini")
 
-    for msg in st.session_state.get("base_messages", []):
-        with st.chat_message(msg["role"], avatar="🧑" if msg["role"] == "user" else "🤖"):
-            st.markdown(msg["content"])
+    render_transcript(st.session_state.base_messages, "base")
 
     user_msg = st.chat_input("Type your message…")
     if user_msg:
         st.session_state.base_messages.append({"role": "user", "content": user_msg})
         with st.chat_message("user"): st.markdown(user_msg)
         with st.chat_message("assistant"):
-            reply = stream_and_accumulate(st.session_state.base_chat, user_msg)
+            reply = stream_and_accumulate(st.session_state.base_chat, user_msg, feature="general_chat")
         if reply:
             st.session_state.base_messages.append({"role": "assistant", "content": reply})
 
@@ -25,14 +21,10 @@ def general_chat_tab():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🧹 Clear Chat"):
-                st.session_state.base_messages = []
-                st.session_state.base_chat = genai.GenerativeModel(MODEL_NAME).start_chat(history=[])
-                st.experimental_rerun()
+                st.session_state.base_messages.clear()
+                st.session_state.base_chat.clear()
+                st.rerun()
         with col2:
-            chat_json = json.dumps(st.session_state.base_messages, indent=2)
-            st.download_button("💾 Save Chat", chat_json, "general_chat.json", "application/json")
+            transcript_export(st.session_state.base_messages, "base", "general_chat.jsonl", "💾 Save Chat")
 
-    file = st.file_uploader("📂 Load Chat", type="json")
-    if file:
-        st.session_state.base_messages = json.load(file)
-        st.experimental_rerun()
\ No newline at end of file
+    transcript_upload(st.session_state.base_messages, "base", "📂 Load Chat")
@@ -1,29 +1,61 @@
 # features/chat_notes.py
-import json
 import streamlit as st
-import google.generativeai as genai
-from core.text_utils import pick_relevant_chunks, build_notes_prompt
+from core.text_utils import build_notes_prompt
+from core.search_index import get_notes_index, notes_version
+from core.notes_library import get_notes_library, open_documents, search_documents
+from core.prompt_budget import prompt_budget
+from core.session_utils import student_id
 from core.gemini_utils import stream_and_accumulate
-from config.settings import MODEL_NAME
+from features.transcript_view import render_transcript, transcript_export, transcript_upload
+
+def library_scope(documents):
+    """Documents picked for Q&A; the session keeps handles to their shared indexes."""
+    names = {doc["id"]: doc["name"] for doc in documents}
+    # A new key whenever the library changes, so new uploads start out selected
+    key = "library_scope_" + notes_version("".join(names))[:12]
+    scope = st.multiselect("Search in", list(names), default=list(names), format_func=names.get, key=key)
+    opened = open_documents(get_notes_library(), scope, st.session_state.get("library_docs"))
+    st.session_state.library_docs = opened  # unselected documents are released
+    return [(doc_id, opened[doc_id][1].value) for doc_id in scope], names
+
+def retrieve(question, indexes, names):
+    """Context chunks for a question, labelled with their document when there are several."""
+    if len(indexes) == 1:
+        return indexes[0][1].top_chunks(question)
+    return [f"[From: {names[doc_id]}]\n{chunk}" for doc_id, chunk in search_documents(indexes, question)]
 
 def notes_qa_tab():
     st.subheader("❓ Ask Questions from Notes")
 
-    if not st.session_state.get("notes_text"):
+    # While a PDF is still streaming in, answer from the pages indexed so far
+    job = st.session_state.get("notes_ingest_job")
+    documents = get_notes_library().documents(student_id())
+    names = {}
+    if job is not None and len(job.index):
+        indexes = [(None, job.index)]
+        st.caption(f"⏳ Still reading your PDF — answering from the first {job.pages_done} pages.")
+    elif len(documents) > 1:
+        indexes, names = library_scope(documents)
+        if not indexes:
+            st.info("Pick at least one document to search.")
+            return
+    elif st.session_state.get("notes_text"):
+        indexes = [(None, get_notes_index(st.session_state.notes_text))]
+    else:
         st.info("Upload notes in the sidebar to enable this tab.")
         return
 
-    for msg in st.session_state.get("notes_messages", []):
-        with st.chat_message(msg["role"], avatar="🧑" if msg["role"] == "user" else "🤖"):
-            st.markdown(msg["content"])
+    render_transcript(st.session_state.notes_messages, "notes")
 
     question = st.chat_input("Ask a question from your notes…")
     if question:
         st.session_state.notes_messages.append({"role": "user", "content": question})
-        chunks = pick_relevant_chunks(st.session_state.notes_text, question)
-        prompt = build_notes_prompt(chunks, question)
+        chunks = retrieve(question, indexes, names)
+        prompt = build_notes_prompt(chunks, question, budget_tokens=prompt_budget("notes_qa"))
         with st.chat_message("assistant", avatar="🤖"):
-            reply = stream_and_accumulate(st.session_state.notes_chat, prompt)
+            # Later turns only need the question, not the notes retrieved for it
+            reply = stream_and_accumulate(st.session_state.notes_chat, prompt, history_text=question,
+                                          feature="notes_qa")
         if reply:
             st.session_state.notes_messages.append({"role": "assistant", "content": reply})
 
@@ -31,14 +63,10 @@ def notes_qa_tab():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🧹 Clear Notes Q&A"):
-                st.session_state.notes_messages = []
-                st.session_state.notes_chat = genai.GenerativeModel(MODEL_NAME).start_chat(history=[])
-                st.experimental_rerun()
+                st.session_state.notes_messages.clear()
+                st.session_state.notes_chat.clear()
+                st.rerun()
         with col2:
-            notes_json = json.dumps(st.session_state.notes_messages, indent=2)
-            st.download_button("💾 Save Notes Chat", notes_json, "notes_chat.json", "application/json")
+            transcript_export(st.session_state.notes_messages, "notes", "notes_chat.jsonl", "💾 Save Notes Chat")
 
-    file = st.file_uploader("📂 Load Notes Chat", type="json")
-    if file:
-        st.session_state.notes_messages = json.load(file)
-        st.experimental_rerun()
\ No newline at end of file
+    transcript_upload(st.session_state.notes_messages, "notes", "📂 Load Notes Chat")
@@ -1,7 +1,121 @@
 # features/quiz_generator.py
 import streamlit as st
-from core.gemini_utils import stream_and_accumulate
-from core.text_utils import parse_mcq_text
+from core.text_utils import ChunkTable
+from core.quiz_engine import SHARD_PROMPT, avoid_text, quiz_job, QuizStream
+from core.jobs import DONE, FAILED, forget_session_job, session_job, submit_session_job
+from core.question_bank import get_question_bank
+from core.session_utils import current_session_id, student_id
+from core.response_cache import response_key
+from core.search_index import notes_version
+from config.settings import MODEL_NAME
+
+def start_quiz(questions, stream=None):
+    st.session_state.generated_mcqs = questions
+    st.session_state.quiz_stream = stream
+    st.session_state.current_mcq_index = 0
+    st.session_state.mcq_score = 0
+    st.session_state.mcq_show_feedback = False
+
+def create_single_quiz(notes_text, num_q, difficulty):
+    """Stream one request in the background; questions become playable as they parse."""
+    bank, version, student = get_question_bank(), notes_version(notes_text), student_id()
+    avoid = avoid_text(bank.questions_by_chunk(version, difficulty).get(0))
+    prompt = SHARD_PROMPT.format(count=num_q, difficulty=difficulty, avoid=avoid, chunk=notes_text)
+    cache_key = response_key(MODEL_NAME, prompt, version)
+    questions = []
+
+    def bank_questions(questions):
+        bank.mark_served(student, bank.add(version, difficulty, questions))
+
+    stream = QuizStream(prompt, current_session_id(), questions, cache_key, on_complete=bank_questions)
+    start_quiz(questions, stream.start())
+
+def create_sharded_quiz(notes_text, chunks, num_q, difficulty):
+    """Questions spread across the whole document, generated as a background job."""
+    job = submit_session_job("quiz", "quiz", f"{num_q} {difficulty} questions", quiz_job,
+                             chunks, num_q, difficulty, current_session_id(), notes_version(notes_text),
+                             student_id())
+    job.wait()  # shards answered from the cache come back without polling
+
+def collect_quiz_job():
+    """Show a running sharded-quiz job; start the quiz once its questions are in."""
+    job = session_job("quiz")
+    if job is None:
+        return False
+    if job.running:
+        st.progress(job.progress, text=job.message or "Generating questions across your notes…")
+        if st.button("✖ Cancel Quiz", key="cancel_quiz"):
+            job.cancel()
+        return True
+    forget_session_job("quiz")
+    if job.status == FAILED:
+        st.error(f"Error while generating questions: {job.error}")
+    elif job.status == DONE and not job.result:
+        st.error("Failed to parse MCQs.")
+    elif job.status == DONE:
+        start_quiz(job.result)
+    return False
+
+def render_quiz():
+    mcqs = st.session_state.get("generated_mcqs")
+    stream = st.session_state.get("quiz_stream")
+    streaming = stream is not None and stream.running
+
+    if stream is not None and not streaming:
+        if stream.error is not None and not mcqs:
+            st.error(f"Error: {stream.error}")
+        if stream.malformed:
+            with st.expander(f"⚠ Skipped {len(stream.malformed)} malformed question(s)"):
+                for msg in stream.malformed:
+                    st.caption(msg)
+    if not mcqs:
+        if streaming:
+            st.info("⏳ Generating the first question…")
+        elif stream is not None and stream.error is None:
+            st.error("Failed to parse MCQs.")
+        return
+
+    q_idx = st.session_state.current_mcq_index
+    if q_idx >= len(mcqs):
+        if streaming:
+            st.info("⏳ The next question is still being generated…")
+            return
+        st.success(f"Quiz complete! Score: {st.session_state.mcq_score}/{len(mcqs)}")
+        if st.button("Restart Quiz"):
+            start_quiz([])
+            st.rerun()
+        return
+
+    q = mcqs[q_idx]
+    more = " (more coming…)" if streaming else ""
+    st.markdown(f"### Question {q_idx + 1} of {len(mcqs)}{more}")
+    st.write(q["question"])
+    choice = st.radio("Choose:", q["options"], key=f"q{q_idx}")
+    if not st.session_state.mcq_show_feedback:
+        if st.button("Submit Answer"):
+            st.session_state.mcq_show_feedback = True
+            if choice == q["answer"]:
+                st.session_state.mcq_score += 1
+            st.rerun()
+    else:
+        if choice == q["answer"]:
+            st.success("✅ Correct!")
+        else:
+            st.error(f"❌ Incorrect! Correct: {q['answer']}")
+        if st.button("Next"):
+            st.session_state.current_mcq_index += 1
+            st.session_state.mcq_show_feedback = False
+            st.rerun()
+
+@st.fragment(run_every=1.0)
+def live_quiz():
+    """Re-render the quiz every second while questions are still being generated."""
+    if collect_quiz_job():
+        return
+    render_quiz()
+    stream = st.session_state.get("quiz_stream")
+    if stream is None or not stream.running:
+        st.rerun()  # full rerun stops the polling once generation is done
 
 def quiz_tab():
     st.subheader("🧪 Generate MCQs")
@@ -13,54 +127,28 @@ def quiz_tab():
     difficulty = st.selectbox("Difficulty", ["Easy", "Medium", "Hard"])
 
     if st.button("🎯 Create Quiz"):
-        prompt = f"""
-From the notes below, generate {num_q} multiple-choice questions of {difficulty} difficulty.
-Provide 4 options (A, B, C, D) and mark the correct one.
-
-Q1. <question text>
-A) <option>
-B) <option>
-C) <option>
-D) <option>
-Answer: <A/B/C/D>
-
-Notes:
-{st.session_state.notes_text}
-"""
-        with st.spinner("Generating questions…"):
-            raw_mcqs = stream_and_accumulate(st.session_state.base_chat, prompt)
-
-        questions = parse_mcq_text(raw_mcqs)
-        if not questions:
-            st.error("Failed to parse MCQs.")
-            return
-
-        st.session_state.generated_mcqs = questions
-        st.session_state.current_mcq_index = 0
-        st.session_state.mcq_score = 0
-        st.session_state.mcq_show_feedback = False
-
-    # quiz rendering
-    if st.session_state.get("generated_mcqs"):
-        q_idx = st.session_state.current_mcq_index
-        q = st.session_state.generated_mcqs[q_idx]
-        st.markdown(f"### Question {q_idx + 1} of {len(st.session_state.generated_mcqs)}")
-        st.write(q["question"])
-        choice = st.radio("Choose:", q["options"], key=f"q{q_idx}")
-        if not st.session_state.mcq_show_feedback:
-            if st.button("Submit Answer"):
-                st.session_state.mcq_show_feedback = True
-                if choice == q["answer"]:
-                    st.session_state.mcq_score += 1
+        stream = st.session_state.get("quiz_stream")
+        if stream is not None:
+            stream.cancel()  # a new quiz replaces the one still generating
+        previous = session_job("quiz")
+        if previous is not None:
+            previous.cancel()
+            forget_session_job("quiz")
+        notes_text = st.session_state.notes_text
+        # Served from the question bank while this student has unseen questions left
+        banked = get_question_bank().draw(notes_version(notes_text), difficulty, student_id(), num_q)
+        if banked is not None:
+            start_quiz(banked)
         else:
-            if choice == q["answer"]:
-                st.success("✅ Correct!")
+            chunks = ChunkTable(notes_text)
+            if len(chunks) > 1:
+                create_sharded_quiz(notes_text, chunks, num_q, difficulty)
             else:
-                st.error(f"❌ Incorrect! Correct: {q['answer']}")
-            if st.button("Next"):
-                st.session_state.current_mcq_index += 1
-                st.session_state.mcq_show_feedback = False
-                if st.session_state.current_mcq_index >= len(st.session_state.generated_mcqs):
-                    st.success(f"Quiz complete! Score: {st.session_state.mcq_score}/{len(st.session_state.generated_mcqs)}")
-                    if st.button("Restart Quiz"):
-                        st.session_state.generated_mcqs = []
\ No newline at end of file
+                create_single_quiz(notes_text, num_q, difficulty)
+
+    stream = st.session_state.get("quiz_stream")
+    job = session_job("quiz")
+    if (stream is not None and stream.running) or (job is not None and job.running):
+        live_quiz()
+    elif not collect_quiz_job():
+        render_quiz()
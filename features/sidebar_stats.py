@@ -1,4 +1,18 @@
 import streamlit as st
+from core.rate_limiter import get_rate_limiter
+from core.response_cache import get_response_cache
+from core.metrics import get_metrics
+from core.startup import get_startup_report
+from core.resource_registry import get_resource_registry
+from core.jobs import get_job_executor
+from core.session_utils import current_session_id
+
+def notes_word_count(notes_text):
+    """Word count of the notes, counted once per notes text rather than on every rerun."""
+    if st.session_state.get("notes_word_count_source") is not notes_text:
+        st.session_state.notes_word_count = len(notes_text.split()) if notes_text else 0
+        st.session_state.notes_word_count_source = notes_text
+    return st.session_state.notes_word_count
 
 def sidebar_stats():
     """Display note statistics and session insights in sidebar."""
@@ -6,7 +20,7 @@ def sidebar_stats():
 
     notes_text = st.session_state.get("notes_text", "")
     note_length = len(notes_text)
-    word_count = len(notes_text.split()) if notes_text else 0
+    word_count = notes_word_count(notes_text)
 
     num_questions = len(st.session_state.get("notes_messages", []))
     mcq_score = st.session_state.get("mcq_score", 0)
@@ -15,3 +29,40 @@ def sidebar_stats():
     st.info(f"📝 **Notes Length:** {word_count:,} words ({note_length:,} chars)")
     st.info(f"❓ **Questions Asked:** {num_questions}")
     st.info(f"🧩 **Quiz Score:** {mcq_score}/{total_mcq}" if total_mcq > 0 else "🧩 No quiz taken yet.")
+
+    queue = get_rate_limiter().stats()
+    st.caption(
+        f"⏳ API queue: {queue['queue_depth']} waiting · "
+        f"median wait {queue['p50_wait']}s · max {queue['max_wait']}s"
+        + (f" · paused {queue['paused_for']}s after a 429" if queue["paused_for"] else "")
+    )
+    cache = get_response_cache().stats()
+    st.caption(f"♻️ Answer cache: {cache['hits']} hits · {cache['misses']} misses")
+    shared = get_resource_registry().stats()
+    st.caption(f"🗂️ Shared notes/indexes/models: {shared['entries']} ({shared['mb']} MB) · "
+               f"{shared['handles']} session handles · {shared['hits']} reuses")
+    jobs = get_job_executor().stats(current_session_id())
+    st.caption(f"⚙️ Background jobs: {jobs['running']} running · {jobs['queued']} queued · "
+               f"{jobs['done']} done" + (f" · {jobs['failed']} failed" if jobs["failed"] else ""))
+    precompute = st.session_state.get("notes_precompute_job")
+    if precompute is not None and precompute.running:
+        st.caption(f"🔮 Preparing summaries and quizzes in the background: {precompute.progress:.0%}")
+
+    with st.expander("⚙️ Performance (recent LLM calls)"):
+        metrics = get_metrics()
+        metrics.maybe_export()
+        rows = metrics.summary()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+            st.caption("Seconds; cache replays are left out of the latency columns.")
+        else:
+            st.caption("No LLM calls yet.")
+
+        startup = get_startup_report().summary()
+        if startup["cold"]:
+            cold = " · ".join(f"{stage} {sec:.2f}s" for stage, sec in startup["cold"].items())
+            st.caption(f"🚀 Cold start: {cold}")
+        if startup["rerun"]:
+            rerun = " · ".join(f"{stage} {p50 * 1000:.0f}/{p90 * 1000:.0f}ms"
+                               for stage, (p50, p90) in startup["rerun"].items())
+            st.caption(f"🔁 Rerun p50/p90 over {startup['reruns']} runs: {rerun}")
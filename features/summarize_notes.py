@@ -1,6 +1,41 @@
 # features/summarize_notes.py
 import streamlit as st
-from core.gemini_utils import stream_and_accumulate
+from core.jobs import DONE, FAILED, CANCELLED, session_job, submit_session_job
+from core.session_utils import current_session_id
+from core.summarizer import STYLE_MAP, summarize_notes
+
+def render_summary(job):
+    """Progress, section summaries and the streamed text of a summary job; the result once done."""
+    if job.running:
+        st.progress(job.progress, text=job.message or "Summarizing…")
+        if st.button("✖ Cancel Summary", key="cancel_summary"):
+            job.cancel()
+    if any(job.sections):
+        with st.expander("📑 Section summaries", expanded=False):
+            for i, summary in enumerate(job.sections):
+                if summary:
+                    st.markdown(f"**Section {i + 1}**\n\n{summary}")
+
+    if job.status == FAILED:
+        st.error(f"Error while summarizing: {job.error}")
+    elif job.status == CANCELLED:
+        st.info("Summary cancelled.")
+    reply = job.result if job.status == DONE else job.partial
+    if reply:
+        st.markdown(f"### Summary ({job.label})")
+        st.markdown(reply)
+    if job.status == DONE and reply:
+        st.download_button("⬇ Download Summary", reply, "summary.txt")
+
+@st.fragment(run_every=1.0)
+def live_summary():
+    """Re-render the running summary job every second."""
+    job = session_job("summary")
+    if job is None:
+        return
+    render_summary(job)
+    if not job.running:
+        st.rerun()  # full rerun stops the polling once the job is done
 
 def summarize_tab():
     st.subheader("📝 Summarize Notes")
@@ -8,22 +43,17 @@ def summarize_tab():
         st.info("Upload notes in the sidebar to enable this tab.")
         return
 
-    level = st.selectbox("Detail level", ["Very short bullets", "Short bullets", "Detailed bullets"])
+    level = st.selectbox("Detail level", list(STYLE_MAP))
     if st.button("🧾 Generate Summary"):
-        style_map = {
-            "Very short bullets": "Keep it extremely concise (max 5 bullets).",
-            "Short bullets": "Use up to 8 bullets with key points.",
-            "Detailed bullets": "Use up to 12 bullets, with brief explanations."
-        }
-        prompt = f"""
-Summarize the following study notes into {style_map[level]}
-Use simple language for quick revision.
+        # Runs in the background: reruns and tab switches do not lose it
+        job = submit_session_job("summary", "summary", level, summarize_notes,
+                                 st.session_state.notes_text, STYLE_MAP[level], current_session_id())
+        job.wait()  # summaries already precomputed or cached come back without polling
 
-Notes:\n\n{st.session_state.notes_text}
-"""
-        with st.spinner("Summarizing…"):
-            reply = stream_and_accumulate(st.session_state.base_chat, prompt)
-        if reply:
-            st.markdown("### Summary")
-            st.markdown(reply)
-            st.download_button("⬇ Download Summary", reply, "summary.txt")
\ No newline at end of file
+    job = session_job("summary")
+    if job is None:
+        return
+    if job.running:
+        live_summary()
+    else:
+        render_summary(job)
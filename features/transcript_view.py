@@ -0,0 +1,72 @@
+# features/transcript_view.py
+import streamlit as st
+from config.settings import TRANSCRIPT_WINDOW_MESSAGES
+
+def show_earlier(key, window):
+    st.session_state[f"{key}_window"] = window + TRANSCRIPT_WINDOW_MESSAGES
+
+def show_latest(key):
+    st.session_state.pop(f"{key}_window", None)
+    st.session_state.pop(f"{key}_paged", None)
+
+def window_messages(transcript, key, start):
+    """transcript[start:], with the part read from disk cached in session state.
+
+    Messages older than the ones the transcript holds in memory are read
+    from its segment files; being append-only, they never change until the
+    chat is cleared or replaced. Only the slice for the current window is
+    kept, so the cache is never larger than what is on screen.
+    """
+    end = transcript.memory_start()
+    if start >= end:
+        st.session_state.pop(f"{key}_paged", None)
+        return transcript.messages(start)
+    cached = st.session_state.get(f"{key}_paged")
+    if cached is None or cached[:3] != (transcript.generation, start, end):
+        cached = (transcript.generation, start, end, transcript.messages(start, end))
+        st.session_state[f"{key}_paged"] = cached
+    return cached[3] + transcript.messages(end)
+
+def render_transcript(transcript, key):
+    """Render the newest messages only, so a rerun costs the same however long the chat is.
+
+    Older messages are paged in TRANSCRIPT_WINDOW_MESSAGES at a time.
+    """
+    window = st.session_state.get(f"{key}_window", TRANSCRIPT_WINDOW_MESSAGES)
+    start = max(0, len(transcript) - window)
+    if start or window > TRANSCRIPT_WINDOW_MESSAGES:
+        col1, col2 = st.columns(2)
+        if start:
+            col1.button(f"⬆ Show {min(start, TRANSCRIPT_WINDOW_MESSAGES)} earlier messages ({start} hidden)",
+                        key=f"{key}_earlier", on_click=show_earlier, args=(key, window))
+        if window > TRANSCRIPT_WINDOW_MESSAGES:
+            col2.button("⬇ Show latest only", key=f"{key}_latest", on_click=show_latest, args=(key,))
+    for msg in window_messages(transcript, key, start):
+        with st.chat_message(msg["role"], avatar="🧑" if msg["role"] == "user" else "🤖"):
+            st.markdown(msg["content"])
+
+def transcript_export(transcript, key, file_name, label):
+    """Build the export only when asked for, then offer it for download."""
+    export_key = f"{key}_export"
+    export = st.session_state.get(export_key)
+    if export is not None and export[0] != len(transcript):
+        export = None  # new messages since it was built
+    if export is None:
+        if st.button(label, key=f"{key}_prepare_export"):
+            export = (len(transcript), b"".join(transcript.iter_export()))
+            st.session_state[export_key] = export
+    if export is not None:
+        st.download_button(f"⬇ Download ({export[0]} messages)", export[1], file_name, "application/jsonl",
+                           key=f"{key}_download", on_click=lambda: st.session_state.pop(export_key, None))
+
+def transcript_upload(transcript, key, label):
+    """Load a saved chat (JSONL, or the older JSON format) once per uploaded file."""
+    file = st.file_uploader(label, type=["jsonl", "json"], key=f"{key}_upload")
+    if file and st.session_state.get(f"{key}_upload_id") != file.file_id:
+        st.session_state[f"{key}_upload_id"] = file.file_id
+        try:
+            transcript.load(file)
+        except ValueError as e:
+            st.error(f"Could not load the chat: {e}")
+            return
+        st.rerun()